@@ -1,8 +1,14 @@
 import pathlib
 import os
+import datetime
+import time
 import sqlite3
+import threading
+import contextlib
+import functools
 import sqlite_vec
-import struct
+import numpy as np
+import orjson
 from typing import List
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -60,6 +66,10 @@ fastapi_app.add_middleware(
 )
 
 # AI CONSTANTS
+# Embeddings are truncated to EMBEDDING_DIMENSIONS; changing either value requires a reindex
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+
 TOOLS = [
     {
         "type": "function",
@@ -85,14 +95,178 @@ TOOLS = [
     },
 ]
 
+@functools.lru_cache(maxsize=None)
+def get_openai_client():
+    """Returns the process-wide OpenAI client, created on first use so its connection pool is reused."""
+    from openai import OpenAI
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
 def serialize(vector: List[float]) -> bytes:
     """Serializes a list of floats into a compact 'raw bytes' format."""
-    return struct.pack(f"{len(vector)}f", *vector)
+    return np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+
+def quantize_int8(vectors) -> np.ndarray:
+    """Unit-normalizes float vectors (one per row) and scales them into int8 for sqlite-vec."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+    return np.clip(np.round(matrix * 127), -128, 127).astype(np.int8)
 
-def get_db_conn(db_path):
-    """Get database connection with sqlite_vec loaded"""
-    conn = sqlite3.connect(db_path)
+def _orjson_default(obj):
+    """Fallback for values orjson cannot serialize natively."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous or object-dtype arrays fall through OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        # Covers pd.Timestamp, a datetime subclass
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(data) -> bytes:
+    """Serializes data (including numpy and pandas values) to UTF-8 JSON bytes with orjson."""
+    return orjson.dumps(
+        data,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+# Per-connection tuning applied on open
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MiB memory map
+)
+
+# Prepared statements kept per connection, enough for every query the app issues
+STATEMENT_CACHE_SIZE = 256
+
+# journal_mode=WAL is persisted in the database file, so it only needs setting once per process
+_wal_enabled = False
+
+def get_db_conn(db_path, readonly: bool = False):
+    """Get database connection with sqlite_vec loaded and pragmas applied.
+
+    The connection runs in autocommit mode; bulk writes open their own transaction.
+    Connections may be handed between threads by the pool, one user at a time.
+    """
+    global _wal_enabled
+    if readonly:
+        conn = sqlite3.connect(
+            f"{pathlib.Path(db_path).as_uri()}?mode=ro",
+            uri=True,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+    else:
+        conn = sqlite3.connect(
+            db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
     conn.enable_load_extension(True)
     sqlite_vec.load(conn)
     conn.enable_load_extension(False)
-    return conn
\ No newline at end of file
+    if not readonly and not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# How long a request waits for a pooled connection before giving up
+POOL_WAIT_SECONDS = 30
+
+class ConnectionPool:
+    """Keeps initialized SQLite connections around so requests skip connect and extension loading
+
+    At most size connections are live at once; further borrowers wait for one to be returned,
+    so a size-1 pool serializes its users.
+    """
+
+    def __init__(self, db_path, size: int, readonly: bool = False):
+        self.db_path = db_path
+        self.readonly = readonly
+        self.size = size
+        self._cond = threading.Condition()
+        self._idle = []  # (connection, generation) pairs, most recently returned last
+        self._live = 0
+        # Bumped by close_all; connections opened before that are closed on return instead of reused
+        self._generation = 0
+
+    def _acquire(self):
+        """Take an idle connection, open one while under size, or wait for one to be returned"""
+        deadline = time.monotonic() + POOL_WAIT_SECONDS
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, generation = self._idle.pop()
+                    if generation == self._generation:
+                        return conn, generation
+                    # Returned while close_all was running; it still points at the old database file
+                    conn.close()
+                    self._live -= 1
+                if self._live < self.size:
+                    self._live += 1
+                    generation = self._generation
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection became available within {POOL_WAIT_SECONDS}s")
+                self._cond.wait(remaining)
+        try:
+            return get_db_conn(self.db_path, readonly=self.readonly), generation
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn, generation):
+        """Put a connection back for reuse, or close it if a close_all retired it"""
+        with self._cond:
+            if generation == self._generation:
+                self._idle.append((conn, generation))
+            else:
+                conn.close()
+                self._live -= 1
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, waiting while all of them are in use"""
+        conn, generation = self._acquire()
+        try:
+            yield conn
+        finally:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn, generation)
+
+    def close_all(self):
+        """Close every idle connection and retire the ones currently borrowed"""
+        with self._cond:
+            self._generation += 1
+            for conn, _ in self._idle:
+                conn.close()
+            self._live -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+# One writer and a few readers per process
+write_pool = ConnectionPool(DB_PATH, size=1)
+read_pool = ConnectionPool(DB_PATH, size=4, readonly=True)
+
+def reload_volume():
+    """Reload the Modal volume, closing pooled connections that still point at the old database file"""
+    write_pool.close_all()
+    read_pool.close_all()
+    volume.reload()
+    # Retire connections opened by other requests while the reload ran
+    write_pool.close_all()
+    read_pool.close_all()
\ No newline at end of file
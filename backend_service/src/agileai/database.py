@@ -1,13 +1,12 @@
 import sqlite3
-import json
+import orjson
 import logging
 import pandas as pd
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
 import os
-import re
+import time
+import hashlib
 from modal import Volume
-import contextlib
 import sqlite_vec
 
 # Configure logging
@@ -19,22 +18,237 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Get volume path from common module
-from .common import VOLUME_DIR, DB_PATH, get_db_conn, serialize
+from .common import (
+    VOLUME_DIR, DB_PATH, read_pool, write_pool, quantize_int8, encode_json, get_openai_client,
+    EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+)
 
-@contextlib.contextmanager
-def get_db_connection():
-    """Context manager for database connections to ensure they are properly closed"""
-    conn = None
-    try:
-        conn = get_db_conn(DB_PATH)
-        yield conn
-    finally:
-        if conn:
-            try:
-                conn.close()
-                logger.debug("Database connection closed successfully")
-            except Exception as e:
-                logger.error(f"Error closing database connection: {e}")
+# Number of texts sent per embeddings API request
+EMBEDDING_BATCH_SIZE = 256
+
+# Issue labels are stored as one TEXT value joined by the ASCII unit separator,
+# which cannot appear in GitHub label names (unlike commas)
+LABEL_SEPARATOR = "\x1f"
+
+# SQL reused on every call, kept as constants so each connection prepares them once
+_UPSERT_REPOSITORY_INFO_SQL = '''
+INSERT INTO repository_data (repo_name, repo_info, last_updated)
+VALUES (?, ?, ?)
+ON CONFLICT(repo_name) DO UPDATE SET
+    repo_info = excluded.repo_info,
+    last_updated = excluded.last_updated
+'''
+
+_SELECT_REPOSITORY_INFO_SQL = '''
+SELECT repo_info
+FROM repository_data
+WHERE repo_name = ? AND last_updated > ?
+'''
+
+_UPSERT_REPO_REFRESH_SQL = '''
+INSERT INTO repo_last_refresh (repo_name, last_updated)
+VALUES (?, ?)
+ON CONFLICT(repo_name) DO UPDATE SET
+    last_updated = excluded.last_updated
+'''
+
+_SELECT_REPO_REFRESH_SQL = '''
+SELECT last_updated
+FROM repo_last_refresh
+WHERE repo_name = ? AND last_updated > ?
+'''
+
+_SELECT_REPOSITORY_ISSUES_SQL = '''
+SELECT id, issue_number, title, body, state, author, comments, labels,
+       created_at, updated_at, closed_at, time_to_close, html_url
+FROM issues
+WHERE repo_name = ?
+ORDER BY issue_number DESC
+'''
+
+_SELECT_ISSUE_TEXT_SQL = '''
+SELECT issue_number, id, title, body
+FROM issues
+WHERE repo_name = ?
+'''
+
+_UPSERT_VISUALIZATION_SQL = '''
+INSERT INTO visualization_cache (repo_name, visualization_type, data, last_updated)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(repo_name, visualization_type) DO UPDATE SET
+    data = excluded.data,
+    last_updated = excluded.last_updated
+'''
+
+_SELECT_VISUALIZATION_SQL = '''
+SELECT data
+FROM visualization_cache
+WHERE repo_name = ? AND visualization_type = ? AND last_updated > ?
+'''
+
+_SELECT_VISUALIZATION_LAST_UPDATED_SQL = '''
+SELECT last_updated
+FROM visualization_cache
+WHERE repo_name = ? AND visualization_type = ?
+'''
+
+_SELECT_VISUALIZATION_VERSION_SQL = '''
+SELECT last_updated, length(data)
+FROM visualization_cache
+WHERE repo_name = ? AND visualization_type = ? AND last_updated > ?
+'''
+
+_INSERT_ISSUE_SQL = '''
+INSERT OR IGNORE INTO issues (id, repo_name, issue_number, title, body, state, author, created_at, updated_at, labels,
+                              comments, closed_at, time_to_close, html_url)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_UPSERT_ISSUE_SQL = '''
+INSERT INTO issues (id, repo_name, issue_number, title, body, state, author, created_at, updated_at, labels,
+                    comments, closed_at, time_to_close, html_url)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(repo_name, issue_number) DO UPDATE SET
+    title = excluded.title,
+    body = excluded.body,
+    state = excluded.state,
+    author = excluded.author,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at,
+    labels = excluded.labels,
+    comments = excluded.comments,
+    closed_at = excluded.closed_at,
+    time_to_close = excluded.time_to_close,
+    html_url = excluded.html_url
+'''
+
+# Columns added to issues after it was first created, applied to older databases by init_db
+_ISSUES_ADDED_COLUMNS = (
+    ("comments", "INTEGER"),
+    ("closed_at", "TEXT"),
+    ("time_to_close", "REAL"),
+    ("html_url", "TEXT"),
+)
+
+# Column definition of vec_issues.embedding, also used to detect a stale vector table
+# Stored as int8 (a quarter of the bytes of float32) from unit-normalized embeddings
+_VEC_ISSUES_EMBEDDING_COLUMN = f"embedding int8[{EMBEDDING_DIMENSIONS}]"
+
+# Values per IN (...) probe, kept under SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+_SELECT_ISSUES_WITHOUT_EMBEDDING_SQL = '''
+SELECT id, title, body
+FROM issues
+WHERE repo_name = ? AND id NOT IN (SELECT id FROM vec_issues)
+'''
+
+_INSERT_EMBEDDING_CACHE_SQL = '''
+INSERT OR IGNORE INTO embedding_cache (hash, vec)
+VALUES (?, ?)
+'''
+
+_INSERT_ISSUE_EMBEDDING_SQL = '''
+INSERT INTO vec_issues (id, embedding)
+VALUES (?, vec_int8(?))
+'''
+
+# The id IN constraint on the vec0 primary key is pushed into the KNN scan, so only this
+# repository's vectors are scored and k results come back even when other repositories are closer
+_SIMILARITY_SEARCH_SQL = '''
+WITH knn AS (
+    SELECT id AS id, distance
+    FROM vec_issues
+    WHERE embedding MATCH vec_int8(?)
+      AND k = ?
+      AND id IN (SELECT id FROM issues WHERE repo_name = ?)
+)
+SELECT
+    knn.id,
+    knn.distance,
+    issues.repo_name,
+    issues.issue_number,
+    issues.title,
+    issues.body,
+    issues.state,
+    issues.author,
+    issues.created_at,
+    issues.labels
+FROM knn
+JOIN issues ON issues.id = knn.id
+ORDER BY knn.distance
+'''
+
+# Metadata of every cache entry for a repository; payloads are only inspected for Nomic rows,
+# which count as cached once their stored object has no status or status "complete"
+_SELECT_CACHE_MANIFEST_SQL = '''
+SELECT 'repo_info', last_updated, 1 FROM repository_data WHERE repo_name = ?
+UNION ALL
+SELECT 'issues', last_updated, 1 FROM repo_last_refresh WHERE repo_name = ?
+UNION ALL
+SELECT
+    visualization_type,
+    last_updated,
+    CASE
+        WHEN visualization_type NOT GLOB 'nomic_atlas_topics_*' THEN 1
+        WHEN NOT json_valid(CAST(data AS TEXT)) THEN 0
+        WHEN json_type(CAST(data AS TEXT)) != 'object' THEN 0
+        ELSE json_type(CAST(data AS TEXT), '$.status') IS NULL
+             OR json_extract(CAST(data AS TEXT), '$.status') = 'complete'
+    END
+FROM visualization_cache
+WHERE repo_name = ?
+'''
+
+_SELECT_ETAG_SQL = '''
+SELECT etag, body, link
+FROM etag_cache
+WHERE url = ? AND token_hash = ? AND last_updated >= ?
+'''
+
+_UPSERT_ETAG_SQL = '''
+INSERT INTO etag_cache (url, token_hash, etag, body, link, last_updated)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(url, token_hash) DO UPDATE SET
+    etag = excluded.etag,
+    body = excluded.body,
+    link = excluded.link,
+    last_updated = excluded.last_updated
+'''
+
+_PRUNE_ETAG_SQL = '''
+DELETE FROM etag_cache
+WHERE last_updated < ?
+'''
+
+# Stored GitHub responses older than this are refetched in full and pruned
+ETAG_CACHE_MAX_AGE_HOURS = 168  # 7 days * 24 hours
+
+_CREATE_QUERY_SCOPE_SQL = '''
+CREATE TEMP TABLE IF NOT EXISTS query_scope (repo_name TEXT NOT NULL)
+'''
+
+_CREATE_SCOPED_ISSUES_VIEW_SQL = '''
+CREATE TEMP VIEW IF NOT EXISTS issues AS
+SELECT * FROM main.issues
+WHERE repo_name = (SELECT repo_name FROM temp.query_scope)
+'''
+
+_DROP_SCOPED_ISSUES_VIEW_SQL = "DROP VIEW IF EXISTS temp.issues"
+_DROP_QUERY_SCOPE_SQL = "DROP TABLE IF EXISTS temp.query_scope"
+
+def _embedding_cache_key(content: str) -> str:
+    """Hash of the text plus the embedding settings, so a model change never reuses old vectors"""
+    return hashlib.sha256(f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}:{content}".encode("utf-8")).hexdigest()
+
+def _cache_cutoff(max_age_hours: int) -> int:
+    """Oldest last_updated epoch (in seconds) that is still considered fresh"""
+    return int(time.time()) - max_age_hours * 3600
+
+def get_db_connection(readonly: bool = False):
+    """Context manager that borrows a pooled database connection and returns it afterwards"""
+    pool = read_pool if readonly else write_pool
+    return pool.connection()
 
 def init_db():
     """Initialize the database with required tables"""
@@ -48,29 +262,30 @@ def init_db():
         CREATE TABLE IF NOT EXISTS repository_data (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             repo_name TEXT NOT NULL UNIQUE,
-            repo_info TEXT NOT NULL,
-            last_updated TIMESTAMP NOT NULL
+            repo_info BLOB NOT NULL,
+            last_updated INTEGER NOT NULL
         )
         ''')
         
-        # Create issues table to store cached issues data
+        # Issues are served from the issues table; this only tracks when each repository was fetched
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS repository_issues (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            repo_name TEXT NOT NULL UNIQUE,
-            issues_data TEXT NOT NULL,
-            last_updated TIMESTAMP NOT NULL
+        CREATE TABLE IF NOT EXISTS repo_last_refresh (
+            repo_name TEXT PRIMARY KEY,
+            last_updated INTEGER NOT NULL
         )
         ''')
         
+        # The whole-list JSON cache is superseded by the issues table
+        cursor.execute("DROP TABLE IF EXISTS repository_issues")
+        
         # Create visualization_cache table to store prepared visualization data
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS visualization_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             repo_name TEXT NOT NULL,
             visualization_type TEXT NOT NULL,
-            data TEXT NOT NULL,
-            last_updated TIMESTAMP NOT NULL,
+            data BLOB NOT NULL,
+            last_updated INTEGER NOT NULL,
             UNIQUE(repo_name, visualization_type)
         )
         ''')
@@ -88,18 +303,81 @@ def init_db():
             created_at TIMESTAMP NOT NULL,
             updated_at TIMESTAMP,
             labels TEXT,
+            comments INTEGER,
+            closed_at TEXT,
+            time_to_close REAL,
+            html_url TEXT,
             UNIQUE(repo_name, issue_number)
         )
         ''')
         
+        existing_columns = {row[1] for row in cursor.execute("PRAGMA table_info(issues)").fetchall()}
+        for column, column_type in _ISSUES_ADDED_COLUMNS:
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE issues ADD COLUMN {column} {column_type}")
+        
+        # Vectors from a different embedding size cannot be compared with new queries,
+        # so a mismatched vector table is dropped and rebuilt by reindex_issue_embeddings
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'vec_issues'")
+        row = cursor.fetchone()
+        if row and _VEC_ISSUES_EMBEDDING_COLUMN not in row[0]:
+            logger.warning("vec_issues was built for a different embedding size; dropping it for reindexing")
+            cursor.execute("DROP TABLE vec_issues")
+        
         # Create vector table for issue embeddings
-        cursor.execute('''
+        cursor.execute(f'''
         CREATE VIRTUAL TABLE IF NOT EXISTS vec_issues USING vec0(
             id INTEGER PRIMARY KEY,
-            embedding FLOAT[1536]
+            {_VEC_ISSUES_EMBEDDING_COLUMN}
         );
         ''')
         
+        # Create embedding_cache table to reuse vectors of identical issue text, keyed by content hash
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            hash TEXT PRIMARY KEY,
+            vec BLOB NOT NULL
+        )
+        ''')
+        
+        # Earlier versions keyed stored responses by URL alone, so a response fetched with one
+        # token could be served to another; those rows cannot be attributed and are dropped
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'etag_cache'")
+        row = cursor.fetchone()
+        if row and "token_hash" not in row[0]:
+            logger.info("Dropping etag_cache entries stored without a token fingerprint")
+            cursor.execute("DROP TABLE etag_cache")
+        
+        # Create etag_cache table to store GitHub responses for conditional requests,
+        # one entry per URL and token fingerprint
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS etag_cache (
+            url TEXT NOT NULL,
+            token_hash TEXT NOT NULL,
+            etag TEXT NOT NULL,
+            body BLOB NOT NULL,
+            link TEXT,
+            last_updated INTEGER NOT NULL,
+            PRIMARY KEY (url, token_hash)
+        )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_etag_cache_last_updated ON etag_cache(last_updated)")
+        
+        # Migrate ISO timestamps written by earlier versions to epoch seconds
+        for table in ("repository_data", "visualization_cache"):
+            cursor.execute(f'''
+            UPDATE {table}
+            SET last_updated = CAST(strftime('%s', last_updated) AS INTEGER)
+            WHERE typeof(last_updated) = 'text'
+            ''')
+        
+        # Earlier versions kept a full LDAvis page per corpus fingerprint (ldavis_<field>_<24 hex chars>);
+        # only the fingerprint itself is stored now
+        cursor.execute(f'''
+        DELETE FROM visualization_cache
+        WHERE visualization_type GLOB 'ldavis_*_{'[0-9a-f]' * 24}'
+        ''')
+        
         conn.commit()
     
     logger.info("Database initialization complete")
@@ -108,85 +386,83 @@ def save_repository_info(repo_name: str, repo_info: Dict[str, Any]):
     """Save repository info to the database cache"""
     logger.info(f"Saving repository info for {repo_name}")
     
-    # Import NumpyJSONEncoder from main.py
-    from .main import NumpyJSONEncoder
-    
-    # Convert dict to JSON using custom encoder
-    repo_info_json = json.dumps(repo_info, cls=NumpyJSONEncoder)
-    now = datetime.now().isoformat()
+    # Serialize straight to bytes; stored as a BLOB
+    repo_info_json = encode_json(repo_info)
+    now = int(time.time())
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
         # Upsert repository data
-        cursor.execute('''
-        INSERT INTO repository_data (repo_name, repo_info, last_updated)
-        VALUES (?, ?, ?)
-        ON CONFLICT(repo_name) DO UPDATE SET
-            repo_info = excluded.repo_info,
-            last_updated = excluded.last_updated
-        ''', (repo_name, repo_info_json, now))
+        cursor.execute(_UPSERT_REPOSITORY_INFO_SQL, (repo_name, repo_info_json, now))
         
         conn.commit()
     
     logger.info(f"Repository info saved for {repo_name}")
 
-def get_repository_info(repo_name: str, max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
-    """Get repository info from the database cache if it exists and is not too old"""
+def get_repository_info_json(repo_name: str, max_age_hours: int = 24) -> Optional[bytes]:
+    """Get the serialized repository info from the database cache, without decoding it"""
     logger.info(f"Getting repository info for {repo_name} from cache")
     
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        # Get repository data
-        cursor.execute('''
-        SELECT repo_info, last_updated 
-        FROM repository_data 
-        WHERE repo_name = ?
-        ''', (repo_name,))
+        # Get repository data, skipping rows that are too old
+        cursor.execute(_SELECT_REPOSITORY_INFO_SQL, (repo_name, _cache_cutoff(max_age_hours)))
         
         row = cursor.fetchone()
     
     if not row:
-        logger.info(f"No cached data found for {repo_name}")
+        logger.info(f"No fresh cached data found for {repo_name}")
         return None
     
-    repo_info_json, last_updated_str = row
-    last_updated = datetime.fromisoformat(last_updated_str)
-    
-    # Check if data is too old
-    if datetime.now() - last_updated > timedelta(hours=max_age_hours):
-        logger.info(f"Cached data for {repo_name} is too old")
+    # Rows written before payloads were stored as BLOBs come back as text
+    return row[0].encode("utf-8") if isinstance(row[0], str) else row[0]
+
+def get_repository_info(repo_name: str, max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
+    """Get repository info from the database cache if it exists and is not too old"""
+    repo_info_json = get_repository_info_json(repo_name, max_age_hours)
+    if repo_info_json is None:
         return None
     
     try:
-        return json.loads(repo_info_json)
-    except json.JSONDecodeError:
+        return orjson.loads(repo_info_json)
+    except orjson.JSONDecodeError:
         logger.error(f"Error decoding JSON data for {repo_name}")
         return None
 
 def save_repository_issues(repo_name: str, issues_data: List[Dict[str, Any]]):
-    """Save repository issues to the database cache"""
+    """Save repository issues to the issues table and mark the repository as refreshed"""
     logger.info(f"Saving repository issues for {repo_name}")
     
-    # Import NumpyJSONEncoder from main.py
-    from .main import NumpyJSONEncoder
+    issues_data = _normalize_issues(repo_name, issues_data)
+    if issues_data is None:
+        return
     
-    # Convert data to JSON using custom encoder
-    issues_data_json = json.dumps(issues_data, cls=NumpyJSONEncoder)
-    now = datetime.now().isoformat()
+    rows = _shape_issue_rows(repo_name, issues_data)
+    now = int(time.time())
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        # Issues that disappeared from GitHub are removed, and vectors of issues whose
+        # text changed are dropped so they get re-embedded
+        stored = {
+            issue_number: (issue_id, title, body)
+            for issue_number, issue_id, title, body in cursor.execute(_SELECT_ISSUE_TEXT_SQL, (repo_name,)).fetchall()
+        }
+        stale_vectors = [
+            (issue_id,) for issue_number, (issue_id, title, body) in stored.items()
+            if issue_number not in rows or rows[issue_number][3:5] != (title, body)
+        ]
+        removed = [(repo_name, issue_number) for issue_number in stored if issue_number not in rows]
+        cursor.executemany("DELETE FROM vec_issues WHERE id = ?", stale_vectors)
+        cursor.executemany("DELETE FROM issues WHERE repo_name = ? AND issue_number = ?", removed)
         
         # Upsert issues data
-        cursor.execute('''
-        INSERT INTO repository_issues (repo_name, issues_data, last_updated)
-        VALUES (?, ?, ?)
-        ON CONFLICT(repo_name) DO UPDATE SET
-            issues_data = excluded.issues_data,
-            last_updated = excluded.last_updated
-        ''', (repo_name, issues_data_json, now))
+        cursor.executemany(_UPSERT_ISSUE_SQL, list(rows.values()))
+        cursor.execute(_UPSERT_REPO_REFRESH_SQL, (repo_name, now))
         
         conn.commit()
     
@@ -196,140 +472,181 @@ def get_repository_issues(repo_name: str, max_age_hours: int = 24) -> Optional[L
     """Get repository issues from the database cache if they exist and are not too old"""
     logger.info(f"Getting repository issues for {repo_name} from cache")
     
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        # Get issues data
-        cursor.execute('''
-        SELECT issues_data, last_updated 
-        FROM repository_issues 
-        WHERE repo_name = ?
-        ''', (repo_name,))
+        # Skip repositories whose last refresh is too old
+        cursor.execute(_SELECT_REPO_REFRESH_SQL, (repo_name, _cache_cutoff(max_age_hours)))
+        if cursor.fetchone() is None:
+            logger.info(f"No fresh cached issues found for {repo_name}")
+            return None
         
-        row = cursor.fetchone()
-    
-    if not row:
-        logger.info(f"No cached issues found for {repo_name}")
-        return None
-    
-    issues_data_json, last_updated_str = row
-    last_updated = datetime.fromisoformat(last_updated_str)
-    
-    # Check if data is too old
-    if datetime.now() - last_updated > timedelta(hours=max_age_hours):
-        logger.info(f"Cached issues for {repo_name} are too old")
-        return None
-    
-    try:
-        issues_data = json.loads(issues_data_json)
-
-        # Defensive cache read: handle legacy caches where list items may be JSON strings
-        if isinstance(issues_data, list) and len(issues_data) > 0:
-            # Check if first item is a string that looks like JSON
-            first_item = issues_data[0]
-            if isinstance(first_item, str) and first_item.strip().startswith('{'):
-                # Likely double-encoded, decode each item
-                logger.warning(f"Detected double-encoded issues cache for {repo_name}, normalizing...")
-                normalized = []
-                for idx, item in enumerate(issues_data):
-                    if isinstance(item, str):
-                        try:
-                            normalized.append(json.loads(item))
-                        except Exception as e:
-                            logger.warning(f"Failed to decode item {idx} in cache for {repo_name}: {e}")
-                    else:
-                        normalized.append(item)
-                return normalized
-
-        return issues_data
-    except json.JSONDecodeError:
-        logger.error(f"Error decoding JSON issues data for {repo_name}")
-        return None
+        rows = cursor.execute(_SELECT_REPOSITORY_ISSUES_SQL, (repo_name,)).fetchall()
+    
+    return [
+        {
+            "id": issue_id,
+            "number": issue_number,
+            "title": title,
+            "body": body,
+            "state": state,
+            "user": author,
+            "comments": comments,
+            "labels": split_labels(labels),
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "closed_at": closed_at,
+            "time_to_close": time_to_close,
+            "html_url": html_url
+        }
+        for (issue_id, issue_number, title, body, state, author, comments, labels,
+             created_at, updated_at, closed_at, time_to_close, html_url) in rows
+    ]
 
 def save_visualization_data(repo_name: str, visualization_type: str, data: Dict[str, Any]):
     """Save visualization data to the database cache"""
     logger.info(f"Saving {visualization_type} visualization for {repo_name}")
     
-    # Import NumpyJSONEncoder from main.py
-    from .main import NumpyJSONEncoder
-    
-    # Convert data to JSON using custom encoder
-    data_json = json.dumps(data, cls=NumpyJSONEncoder)
-    now = datetime.now().isoformat()
+    # Serialize straight to bytes; stored as a BLOB
+    data_json = encode_json(data)
+    now = int(time.time())
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
         # Upsert visualization data
-        cursor.execute('''
-        INSERT INTO visualization_cache (repo_name, visualization_type, data, last_updated)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(repo_name, visualization_type) DO UPDATE SET
-            data = excluded.data,
-            last_updated = excluded.last_updated
-        ''', (repo_name, visualization_type, data_json, now))
+        cursor.execute(_UPSERT_VISUALIZATION_SQL, (repo_name, visualization_type, data_json, now))
         
         conn.commit()
     
     logger.info(f"{visualization_type} visualization saved for {repo_name}")
 
-def get_visualization_data(repo_name: str, visualization_type: str, max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
-    """Get visualization data from the cache if it exists and is not too old"""
+def get_visualization_data_json(repo_name: str, visualization_type: str, max_age_hours: int = 24) -> Optional[bytes]:
+    """Get serialized visualization data from the cache, without decoding it"""
     logger.info(f"Getting {visualization_type} visualization for {repo_name} from cache")
     
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        # Get visualization data
-        cursor.execute('''
-        SELECT data, last_updated 
-        FROM visualization_cache 
-        WHERE repo_name = ? AND visualization_type = ?
-        ''', (repo_name, visualization_type))
+        # Get visualization data, skipping rows that are too old
+        cursor.execute(_SELECT_VISUALIZATION_SQL, (repo_name, visualization_type, _cache_cutoff(max_age_hours)))
         
         row = cursor.fetchone()
     
     if not row:
-        logger.info(f"No cached {visualization_type} visualization found for {repo_name}")
+        logger.info(f"No fresh cached {visualization_type} visualization found for {repo_name}")
         return None
     
-    data_json, last_updated_str = row
-    last_updated = datetime.fromisoformat(last_updated_str)
-    
-    # Check if data is too old
-    if datetime.now() - last_updated > timedelta(hours=max_age_hours):
-        logger.info(f"Cached {visualization_type} visualization for {repo_name} is too old")
+    # Rows written before payloads were stored as BLOBs come back as text
+    return row[0].encode("utf-8") if isinstance(row[0], str) else row[0]
+
+def get_visualization_data(repo_name: str, visualization_type: str, max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
+    """Get visualization data from the cache if it exists and is not too old"""
+    data_json = get_visualization_data_json(repo_name, visualization_type, max_age_hours)
+    if data_json is None:
         return None
     
     try:
-        return json.loads(data_json)
-    except json.JSONDecodeError:
+        return orjson.loads(data_json)
+    except orjson.JSONDecodeError:
         logger.error(f"Error decoding JSON visualization data for {repo_name}")
         return None
 
-def save_issues_with_embeddings(repo_name: str, issues_data: List[Dict[str, Any]]):
-    """Save individual issues to the database and generate embeddings"""
-    from openai import OpenAI
-    import os
+def get_visualization_last_updated(repo_name: str, visualization_type: str) -> Optional[int]:
+    """Get when a visualization was last written (epoch seconds), regardless of its age"""
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(_SELECT_VISUALIZATION_LAST_UPDATED_SQL, (repo_name, visualization_type)).fetchone()
+    
+    return row[0] if row else None
+
+def get_visualization_version(repo_name: str, visualization_type: str, max_age_hours: int = 24) -> Optional[Tuple[int, int]]:
+    """Get (last_updated, payload size) of a fresh cached visualization without reading its payload"""
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(
+            _SELECT_VISUALIZATION_VERSION_SQL, (repo_name, visualization_type, _cache_cutoff(max_age_hours))
+        ).fetchone()
+    
+    return (row[0], row[1]) if row else None
+
+def get_cache_manifest(repo_name: str) -> Dict[str, Tuple[int, bool]]:
+    """Map each cached entry of a repository to (last_updated epoch, complete) without loading payloads"""
+    with get_db_connection(readonly=True) as conn:
+        rows = conn.execute(_SELECT_CACHE_MANIFEST_SQL, (repo_name, repo_name, repo_name)).fetchall()
     
+    return {entry: (last_updated, bool(complete)) for entry, last_updated, complete in rows}
+
+def clear_repository_cache(repo_name: str):
+    """Delete all cached data for a repository in one write transaction"""
+    logger.info(f"Clearing cache for {repo_name}")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        # Delete repo info
+        cursor.execute("DELETE FROM repository_data WHERE repo_name = ?", (repo_name,))
+        
+        # Expire issues; the rows stay in the issues table and are refreshed on next fetch
+        cursor.execute("DELETE FROM repo_last_refresh WHERE repo_name = ?", (repo_name,))
+        
+        # Delete visualization data
+        cursor.execute("DELETE FROM visualization_cache WHERE repo_name = ?", (repo_name,))
+        
+        conn.commit()
+    
+    logger.info(f"Cache cleared for {repo_name}")
+
+def get_etag_entry(url: str, token_hash: str) -> Optional[Tuple[str, bytes, str]]:
+    """Get the stored (etag, body, link header) for a GitHub API URL fetched with the given token"""
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(_SELECT_ETAG_SQL, (url, token_hash, _cache_cutoff(ETAG_CACHE_MAX_AGE_HOURS))).fetchone()
+    
+    if not row:
+        return None
+    
+    etag, body, link = row
+    return etag, body, link or ''
+
+def save_etag_entry(url: str, token_hash: str, etag: str, body: bytes, link: str):
+    """Store the latest response body and ETag for a GitHub API URL, pruning expired entries"""
+    with get_db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(_PRUNE_ETAG_SQL, (_cache_cutoff(ETAG_CACHE_MAX_AGE_HOURS),))
+        conn.execute(_UPSERT_ETAG_SQL, (url, token_hash, etag, body, link, int(time.time())))
+        conn.commit()
+
+def split_labels(value: Optional[str]) -> List[str]:
+    """Split a stored labels value back into label names."""
+    if not value:
+        return []
+    if value.startswith('['):
+        # Rows written before labels were delimiter-joined hold a JSON array
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return value.split(LABEL_SEPARATOR)
+
+def _normalize_issues(repo_name: str, issues_data) -> Optional[List[Dict[str, Any]]]:
+    """Coerce issues passed as JSON text or JSON-string items into a list of dicts"""
     # Handle case where issues_data might be a string (from corrupted cache)
     if isinstance(issues_data, str):
         try:
-            issues_data = json.loads(issues_data)
-        except (json.JSONDecodeError, TypeError):
+            issues_data = orjson.loads(issues_data)
+        except (orjson.JSONDecodeError, TypeError):
             logger.error(f"Invalid issues_data format for {repo_name}: expected list, got {type(issues_data)}")
-            return
+            return None
     
     if not isinstance(issues_data, list):
         logger.error(f"Invalid issues_data format for {repo_name}: expected list, got {type(issues_data)}")
-        return
+        return None
 
     # Normalize per-item: handle legacy caches where items may be JSON strings
     normalized = []
     for idx, item in enumerate(issues_data):
         if isinstance(item, str):
             try:
-                item = json.loads(item)
+                item = orjson.loads(item)
             except Exception as e:
                 logger.warning(f"Skipping non-JSON issue at index {idx} for {repo_name}: {type(item)} - {e}")
                 continue
@@ -337,176 +654,256 @@ def save_issues_with_embeddings(repo_name: str, issues_data: List[Dict[str, Any]
             logger.warning(f"Skipping non-dict issue at index {idx} for {repo_name}: {type(item)}")
             continue
         normalized.append(item)
-    issues_data = normalized
+    return normalized
+
+def _shape_issue_rows(repo_name: str, issues_data: List[Dict[str, Any]]) -> Dict[int, tuple]:
+    """Shape issues into issues-table rows keyed by issue number, skipping issues without id/number"""
+    rows = {}
+    for issue in issues_data:
+        issue_id = issue.get('id') or issue.get('issue_id')
+        issue_number = issue.get('number') or issue.get('issue_number')
+        title = issue.get('title', '')
+        body = issue.get('body', '')
+        state = issue.get('state', 'open')
+
+        raw_user = issue.get('user') or issue.get('author')
+        if isinstance(raw_user, dict):
+            author = raw_user.get('login', '')
+        else:
+            author = raw_user or ''
+
+        created_at = issue.get('created_at', '')
+        updated_at = issue.get('updated_at', '')
+
+        labels_data = issue.get('labels', [])
+        if isinstance(labels_data, str):
+            labels_data = split_labels(labels_data)
+        labels = LABEL_SEPARATOR.join(labels_data)
+
+        if issue_id is None or issue_number is None:
+            logger.warning(
+                "Skipping issue without id/number: repo=%s payload_keys=%s",
+                repo_name,
+                list(issue.keys())
+            )
+            continue
+
+        rows.setdefault(
+            issue_number,
+            (issue_id, repo_name, issue_number, title, body, state, author, created_at, updated_at, labels,
+             issue.get('comments'), issue.get('closed_at'), issue.get('time_to_close'), issue.get('html_url'))
+        )
+    return rows
+
+def _create_embeddings(texts_by_key: Dict[str, str]) -> List[Tuple[str, bytes]]:
+    """Embed each text once through the API, returning (cache key, quantized vector) pairs"""
+    uncached = list(texts_by_key.items())
+    client = get_openai_client()
+    entries = []
+    for start in range(0, len(uncached), EMBEDDING_BATCH_SIZE):
+        batch = uncached[start:start + EMBEDDING_BATCH_SIZE]
+        try:
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[content for _, content in batch],
+                dimensions=EMBEDDING_DIMENSIONS
+            )
+        except Exception as e:
+            logger.error(f"Failed to create embeddings for a batch of {len(batch)} issues: {e}")
+            continue
+
+        # Embeddings are returned in input order; quantize the batch as one matrix
+        matrix = quantize_int8([item.embedding for item in response.data])
+        entries.extend((key, matrix[i].tobytes()) for i, (key, _) in enumerate(batch))
+    return entries
+
+def _embed_missing_issues(repo_name: str, new_rows: List[tuple] = ()) -> int:
+    """Store new issue rows and embed combined title and body of every issue of the repository without a vector
+
+    Lookups and embedding API calls happen before the write transaction, so the write lock
+    is only held for the inserts, and both tables are committed together.
+    """
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SELECT_ISSUES_WITHOUT_EMBEDDING_SQL, (repo_name,))
+        candidates = cursor.fetchall() + [(row[0], row[3], row[4]) for row in new_rows]
+        pending = []
+        for issue_id, title, body in candidates:
+            content = f"{title}\n\n{body}" if body else title
+            if content and content.strip():
+                pending.append((issue_id, _embedding_cache_key(content), content))
+
+        # Reuse vectors of identical text embedded earlier, by this or any other repository
+        vectors_by_key = {}
+        keys = list({key for _, key, _ in pending})
+        for start in range(0, len(keys), IN_CLAUSE_CHUNK_SIZE):
+            chunk = keys[start:start + IN_CLAUSE_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"SELECT hash, vec FROM embedding_cache WHERE hash IN ({placeholders})", chunk)
+            vectors_by_key.update(cursor.fetchall())
+
+    # Each distinct uncached text is sent to the API once
+    uncached = {}
+    for _, key, content in pending:
+        if key not in vectors_by_key:
+            uncached.setdefault(key, content)
+    new_entries = _create_embeddings(uncached)
+    vectors_by_key.update(new_entries)
+    logger.info(f"Embedded {len(uncached)} texts for {repo_name}, {len(pending) - len(uncached)} issues served from the embedding cache")
 
-    logger.info(f"Saving {len(issues_data)} issues with embeddings for {repo_name}")
-    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        
-        for issue in issues_data:
-            issue_id = issue.get('id') or issue.get('issue_id')
-            issue_number = issue.get('number') or issue.get('issue_number')
-            title = issue.get('title', '')
-            body = issue.get('body', '')
-            state = issue.get('state', 'open')
-
-            raw_user = issue.get('user') or issue.get('author')
-            if isinstance(raw_user, dict):
-                author = raw_user.get('login', '')
-            else:
-                author = raw_user or ''
-
-            created_at = issue.get('created_at', '')
-            updated_at = issue.get('updated_at', '')
-
-            labels_data = issue.get('labels', [])
-            if isinstance(labels_data, str):
-                labels = labels_data
-            else:
-                labels = json.dumps(labels_data)
-
-            if issue_id is None or issue_number is None:
-                logger.warning(
-                    "Skipping issue without id/number when storing embeddings: repo=%s payload_keys=%s",
-                    repo_name,
-                    list(issue.keys())
-                )
-                continue
-            
-            # Check if issue already exists
-            cursor.execute("SELECT id FROM issues WHERE repo_name = ? AND issue_number = ?", 
-                         (repo_name, issue_number))
-            
-            if cursor.fetchone() is None:
-                # Insert issue
-                cursor.execute('''
-                INSERT INTO issues (id, repo_name, issue_number, title, body, state, author, created_at, updated_at, labels)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (issue_id, repo_name, issue_number, title, body, state, author, created_at, updated_at, labels))
-                
-                # Generate embedding for combined title and body
-                content = f"{title}\n\n{body}" if body else title
-                if content and content.strip():
-                    try:
-                        embedding = client.embeddings.create(
-                            model="text-embedding-ada-002", 
-                            input=content
-                        ).data[0].embedding
-                        
-                        cursor.execute('''
-                        INSERT INTO vec_issues (id, embedding)
-                        VALUES (?, ?)
-                        ''', (issue_id, serialize(embedding)))
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to create embedding for issue {issue_number}: {e}")
-        
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # Already stored issues are left untouched by the unique constraint
+        cursor.executemany(_INSERT_ISSUE_SQL, list(new_rows))
+        cursor.executemany(_INSERT_EMBEDDING_CACHE_SQL, new_entries)
+
+        # Skip issues that another writer embedded while the API calls were in flight
+        cursor.execute(_SELECT_ISSUES_WITHOUT_EMBEDDING_SQL, (repo_name,))
+        still_missing = {row[0] for row in cursor.fetchall()}
+        vectors = [
+            (issue_id, vectors_by_key[key]) for issue_id, key, _ in pending
+            if issue_id in still_missing and key in vectors_by_key
+        ]
+        cursor.executemany(_INSERT_ISSUE_EMBEDDING_SQL, vectors)
+
+        # Both tables are written in one transaction, so a single sync covers the batch
         conn.commit()
+
+    return len(vectors)
+
+def save_issues_with_embeddings(repo_name: str, issues_data: List[Dict[str, Any]]):
+    """Save individual issues to the database and generate embeddings"""
+    issues_data = _normalize_issues(repo_name, issues_data)
+    if issues_data is None:
+        return
+
+    logger.info(f"Saving {len(issues_data)} issues with embeddings for {repo_name}")
+
+    # First pass: shape each issue into a row, keyed by issue number
+    rows = _shape_issue_rows(repo_name, issues_data)
+
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+
+        # One probe per chunk of issue numbers, served by the UNIQUE(repo_name, issue_number) index;
+        # issues that are already stored are skipped rather than bounced off the constraint
+        issue_numbers = list(rows)
+        existing = set()
+        for start in range(0, len(issue_numbers), IN_CLAUSE_CHUNK_SIZE):
+            chunk = issue_numbers[start:start + IN_CLAUSE_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT issue_number FROM issues WHERE repo_name = ? AND issue_number IN ({placeholders})",
+                [repo_name, *chunk]
+            )
+            existing.update(row[0] for row in cursor.fetchall())
+
+    # Second pass: store the new issues and embed every issue that has no vector yet
+    _embed_missing_issues(
+        repo_name,
+        [row for issue_number, row in rows.items() if issue_number not in existing]
+    )
     
     logger.info(f"Issues with embeddings saved for {repo_name}")
 
-def similarity_search_issues(repo_name: str, query: str, top_k: int = 15):
-    """Search for similar issues using vector similarity"""
-    from openai import OpenAI
-    import os
+def reindex_issue_embeddings() -> int:
+    """Embed every stored issue that has no vector, e.g. after the embedding model changed"""
+    total = 0
     
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    with get_db_connection(readonly=True) as conn:
+        repo_names = [row[0] for row in conn.execute("SELECT DISTINCT repo_name FROM issues").fetchall()]
     
-    with get_db_connection() as conn:
+    # One transaction per repository so progress survives a failure part-way through
+    for repo_name in repo_names:
+        count = _embed_missing_issues(repo_name)
+        logger.info(f"Reindexed {count} issue embeddings for {repo_name}")
+        total += count
+    
+    return total
+
+def similarity_search_issues(repo_name: str, query: str, top_k: int = 15):
+    """Search for similar issues using vector similarity"""
+    client = get_openai_client()
+    
+    # Generate query embedding before borrowing a connection, so the API round trip
+    # does not hold one of the pooled readers
+    query_embedding = client.embeddings.create(
+        model=EMBEDDING_MODEL, 
+        input=query,
+        dimensions=EMBEDDING_DIMENSIONS
+    ).data[0].embedding
+    query_bytes = quantize_int8(query_embedding)[0].tobytes()
+    
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        # Generate query embedding
-        query_embedding = client.embeddings.create(
-            model="text-embedding-ada-002", 
-            input=query
-        ).data[0].embedding
-        query_bytes = serialize(query_embedding)
-        
-        # Search for similar issues
-        results = cursor.execute('''
-        SELECT
-            vec_issues.id,
-            distance,
-            issues.repo_name,
-            issues.issue_number,
-            issues.title,
-            issues.body,
-            issues.state,
-            issues.author,
-            issues.created_at,
-            issues.labels
-        FROM vec_issues
-        LEFT JOIN issues ON vec_issues.id = issues.id
-        WHERE embedding MATCH ? AND k = ? AND issues.repo_name = ?
-        ORDER BY distance
-        ''', [query_bytes, top_k, repo_name]).fetchall()
+        # Search for similar issues; sqlite-vec scans the repository's vectors in one native KNN pass
+        results = cursor.execute(_SIMILARITY_SEARCH_SQL, [query_bytes, top_k, repo_name]).fetchall()
     
     return results
 
+def _query_error(message: str, query: str) -> Dict[str, str]:
+    """Error result returned to the chat handler instead of raising"""
+    return {"error": message, "query": query}
+
+def _issues_query_authorizer(action, arg1, arg2, db_name, source):
+    """Allow read-only statements and keep main.issues reachable only through the scoped view."""
+    if action in (sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE):
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_READ:
+        if arg1 == 'issues' and db_name == 'main' and source is None:
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
+
 def execute_sql_query_on_issues(repo_name: str, sql_query: str):
     """Execute SQL query on the issues table"""
     logger.info(f"Executing SQL query on issues for {repo_name}: {sql_query}")
     
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
         try:
             sanitized_query = sql_query.strip().rstrip(';')
 
             if not sanitized_query:
-                result = {
-                    "error": "Empty SQL query provided.",
-                    "query": sql_query
-                }
-                return result
-
-            if not sanitized_query.lower().startswith("select"):
-                result = {
-                    "error": "Only SELECT statements are allowed.",
-                    "query": sanitized_query
-                }
-                return result
+                return _query_error("Empty SQL query provided.", sql_query)
 
-            if ';' in sanitized_query:
-                result = {
-                    "error": "Multiple SQL statements are not allowed.",
-                    "query": sanitized_query
-                }
-                return result
-
-            # Build a temporary table scoped to the requested repository
-            cursor.execute("DROP TABLE IF EXISTS issues_filtered")
-            cursor.execute(
-                "CREATE TEMP TABLE issues_filtered AS "
-                "SELECT * FROM issues WHERE repo_name = ?",
-                (repo_name,)
-            )
+            if sanitized_query[:6].lower() != "select":
+                return _query_error("Only SELECT statements are allowed.", sanitized_query)
 
-            # Rewrite any reference to the issues table so it uses the filtered data
-            filtered_query = re.sub(r'\bissues\b', 'issues_filtered', sanitized_query, flags=re.IGNORECASE)
+            if ';' in sanitized_query:
+                return _query_error("Multiple SQL statements are not allowed.", sanitized_query)
 
-            rows = cursor.execute(filtered_query).fetchall()
+            # A temp view named "issues" shadows main.issues for unqualified names, so the
+            # query runs unmodified against the requested repository only. The view is
+            # dropped again before the pooled connection is returned, so other queries on
+            # it keep seeing every repository.
+            try:
+                cursor.execute(_CREATE_QUERY_SCOPE_SQL)
+                cursor.execute(_CREATE_SCOPED_ISSUES_VIEW_SQL)
+                cursor.execute("DELETE FROM temp.query_scope")
+                cursor.execute("INSERT INTO temp.query_scope (repo_name) VALUES (?)", (repo_name,))
 
-            column_names = [description[0] for description in cursor.description]
+                conn.set_authorizer(_issues_query_authorizer)
+                try:
+                    rows = cursor.execute(sanitized_query).fetchall()
+                    column_names = [description[0] for description in cursor.description]
+                finally:
+                    conn.set_authorizer(None)
+            finally:
+                cursor.execute(_DROP_SCOPED_ISSUES_VIEW_SQL)
+                cursor.execute(_DROP_QUERY_SCOPE_SQL)
 
             result = {
                 "columns": column_names,
                 "rows": rows,
-                "query": filtered_query
+                "query": sanitized_query
             }
         except Exception as e:
             logger.error(f"SQL query execution failed: {e}")
-            result = {
-                "error": str(e),
-                "query": sql_query
-            }
-        finally:
-            try:
-                cursor.execute("DROP TABLE IF EXISTS issues_filtered")
-            except Exception as drop_error:
-                logger.warning(f"Unable to drop temporary issues_filtered table: {drop_error}")
+            result = _query_error(str(e), sql_query)
 
         return result
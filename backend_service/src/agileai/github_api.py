@@ -1,11 +1,18 @@
 import logging
 import warnings
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import datetime
+import hashlib
 import os
+import re
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 
+from .database import get_etag_entry, save_etag_entry
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +21,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Issue pages fetched concurrently once the page count is known
+MAX_PAGE_WORKERS = 8
+
+_NEXT_PAGE_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+# Shared session so all GitHub requests reuse pooled keep-alive connections
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
 def get_github_token() -> Optional[str]:
     """Get GitHub token from environment variables."""
     token = os.environ.get('GITHUB_TOKEN')
@@ -40,8 +57,7 @@ def get_info(repo: str, github_token: Optional[str] = None) -> Dict[str, int]:
         logger.info("No GitHub token available. Making unauthenticated request for repo info.")
     
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response, body, _ = _conditional_get(url, headers)
         
         # Check rate limits
         remaining = response.headers.get('X-RateLimit-Remaining')
@@ -51,7 +67,7 @@ def get_info(repo: str, github_token: Optional[str] = None) -> Dict[str, int]:
             logger.warning(msg)
             warnings.warn(msg, UserWarning)
         
-        data = response.json()
+        data = orjson.loads(body)
         return {
             "num_pull_requests": data["open_issues_count"],
             "num_contributors": data["subscribers_count"],
@@ -68,7 +84,11 @@ def get_info(repo: str, github_token: Optional[str] = None) -> Dict[str, int]:
         return {}
 
 def get_issues(repo: str, github_token: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Retrieve issue data from GitHub API with pagination support."""
+    """Retrieve issue data from GitHub API with pagination support.
+    
+    Raises requests.exceptions.HTTPError when any page fails, so callers never mistake
+    a failed fetch for a repository without issues.
+    """
     # Use provided token or get from environment
     token = github_token or get_github_token()
     
@@ -82,31 +102,82 @@ def get_issues(repo: str, github_token: Optional[str] = None) -> List[Dict[str,
         logger.info("No GitHub token available. Making unauthenticated request for issues.")
     
     data = []
-    next_url = f"https://api.github.com/repos/{repo}/issues?state=all&per_page=100"
+    first_url = f"https://api.github.com/repos/{repo}/issues?state=all&per_page=100"
+    
+    def _fetch(url: str) -> Tuple[bytes, str]:
+        logger.debug(f"Fetching page: {url}")
+        _, body, link_header = _conditional_get(url, headers)
+        return body, link_header
+    
+    def _collect(body: bytes) -> None:
+        page_data, parse_errors = _process_issues_page(orjson.loads(body))
+        data.extend(page_data)
+        
+        if parse_errors:
+            logger.warning(f"Encountered {parse_errors} parsing errors in current page")
     
     try:
-        while next_url:
-            logger.debug(f"Fetching page: {next_url}")
-            response = requests.get(next_url, headers=headers)
-            response.raise_for_status()
-            
-            # Process current page
-            page_data, parse_errors = _process_issues_page(response.json())
-            data.extend(page_data)
-            
-            if parse_errors:
-                logger.warning(f"Encountered {parse_errors} parsing errors in current page")
-            
-            # Get next page URL
-            next_url = _get_next_page_url(response.headers.get('link', ''))
+        body, link_header = _fetch(first_url)
+        _collect(body)
+        
+        last_page = _get_last_page_number(link_header)
+        if last_page:
+            # Page count is known: fetch the remaining pages concurrently, keeping page order
+            page_urls = [f"{first_url}&page={page}" for page in range(2, last_page + 1)]
+            with ThreadPoolExecutor(max_workers=MAX_PAGE_WORKERS) as executor:
+                for body, _ in executor.map(_fetch, page_urls):
+                    _collect(body)
+        else:
+            # Otherwise follow the next links one at a time
+            next_url = _get_next_page_url(link_header)
+            while next_url:
+                body, link_header = _fetch(next_url)
+                _collect(body)
+                next_url = _get_next_page_url(link_header)
             
         logger.info(f"Retrieved {len(data)} total issues")
         return data
     
     except requests.exceptions.HTTPError as e:
         logger.error(f"Failed to fetch issues: {e}")
-        warnings.warn(f"HTTP error occurred: {e}", UserWarning)
-        return []
+        raise
+
+def _token_hash(headers: Dict[str, str]) -> str:
+    """Fingerprint of the request's credentials, so stored responses are only reused for the same token"""
+    authorization = headers.get("Authorization", "")
+    return hashlib.blake2b(authorization.encode("utf-8"), digest_size=16).hexdigest()
+
+def _conditional_get(url: str, headers: Dict[str, str]) -> Tuple[requests.Response, bytes, str]:
+    """GET a GitHub API URL, reusing the stored body when GitHub answers 304 Not Modified.
+    
+    Returns (response, body, link_header).
+    """
+    token_hash = _token_hash(headers)
+    try:
+        cached = get_etag_entry(url, token_hash)
+    except Exception as e:
+        logger.warning(f"Could not read ETag cache for {url}: {e}")
+        cached = None
+    
+    request_headers = dict(headers)
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+    
+    response = _session.get(url, headers=request_headers)
+    if response.status_code == 304 and cached:
+        logger.debug(f"Not modified since last fetch: {url}")
+        return response, cached[1], cached[2]
+    response.raise_for_status()
+    
+    link_header = response.headers.get('link', '')
+    etag = response.headers.get('ETag')
+    if etag:
+        try:
+            save_etag_entry(url, token_hash, etag, response.content, link_header)
+        except Exception as e:
+            logger.warning(f"Could not store ETag for {url}: {e}")
+    
+    return response, response.content, link_header
 
 def _process_issues_page(issues: List[Dict]) -> Tuple[List[Dict], int]:
     """Process a page of issues and return (data, error_count)."""
@@ -154,7 +225,13 @@ def _parse_gh_date(date_str: Optional[str]) -> Optional[datetime.datetime]:
     if not date_str:
         return None
     try:
-        return datetime.datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ")
+        # Fixed-width "YYYY-MM-DDTHH:MM:SSZ"; slicing avoids strptime re-parsing the format
+        if len(date_str) != 20 or date_str[10] != "T" or date_str[19] != "Z":
+            raise ValueError("expected YYYY-MM-DDTHH:MM:SSZ")
+        return datetime.datetime(
+            int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+            int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19])
+        )
     except (ValueError, TypeError) as e:
         logger.error(f"Failed to parse date {date_str}: {e}")
         return None
@@ -174,7 +251,13 @@ def _get_next_page_url(link_header: Optional[str]) -> Optional[str]:
     if not link_header:
         return None
     
-    for link in link_header.split(", "):
-        if 'rel="next"' in link:
-            return link[link.index("<")+1:link.index(">")]
-    return None 
+    match = _NEXT_PAGE_RE.search(link_header)
+    return match.group(1) if match else None
+
+def _get_last_page_number(link_header: Optional[str]) -> Optional[int]:
+    """Extract the last page number from GitHub link header."""
+    if not link_header:
+        return None
+    
+    match = _LAST_PAGE_RE.search(link_header)
+    return int(match.group(1)) if match else None
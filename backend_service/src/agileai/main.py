@@ -1,70 +1,152 @@
-import sqlite3
-from modal import asgi_app
+from modal import asgi_app, FunctionCall
+from modal.exception import OutputExpiredError, TimeoutError as ModalTimeoutError
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import pandas as pd
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 import json
+import orjson
 from pydantic import BaseModel
 import logging
 import numpy as np
-from fastapi.responses import JSONResponse, HTMLResponse
-import gensim
-from gensim.utils import simple_preprocess
-from gensim.parsing.preprocessing import STOPWORDS
-import pyLDAvis
-import pyLDAvis.gensim_models
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 import re
-from datetime import datetime, timedelta
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+import glob
+import hashlib
+import html
+import uuid
+from urllib.parse import quote
 # Fix for the fork() warning
 os.environ['JOBLIB_START_METHOD'] = 'forkserver'
 
-from .common import DB_PATH, VOLUME_DIR, app, fastapi_app, volume, TOOLS
+from .common import VOLUME_DIR, app, fastapi_app, volume, reload_volume, get_openai_client, encode_json, TOOLS
 from .github_api import get_info, get_issues
 from .database import (
     init_db, 
     get_repository_info, 
+    get_repository_info_json,
     save_repository_info,
     get_repository_issues,
     save_repository_issues,
     get_visualization_data,
+    get_visualization_data_json,
+    get_visualization_version,
+    get_visualization_last_updated,
     save_visualization_data,
+    get_cache_manifest,
+    clear_repository_cache,
     save_issues_with_embeddings,
+    reindex_issue_embeddings,
     similarity_search_issues,
+    split_labels,
     execute_sql_query_on_issues
 )
 from .visualization import (
+    extract_field,
     prepare_wordcloud_data,
     prepare_topic_modeling_data,
     prepare_repository_insights,
     prepare_nomic_atlas_topics
 )
 
-# Custom JSON encoder to handle NumPy types
-class NumpyJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, pd.Timestamp):
-            return obj.isoformat()
-        return super(NumpyJSONEncoder, self).default(obj)
-
-# Custom response class that uses the NumpyJSONEncoder
-class CustomJSONResponse(JSONResponse):
-    def render(self, content):
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            cls=NumpyJSONEncoder,
-        ).encode("utf-8")
+logger = logging.getLogger(__name__)
+
+# Text cleaning patterns for LDA, compiled once
+_URL_RE = re.compile(r'https?://\S+')
+_NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+_WS_RE = re.compile(r'\s+')
+
+# Cleaned text is lowercase letters and single spaces, so tokens are whole words of 4-15
+# letters: the same ones simple_preprocess (max_len=15) keeps after the len > 3 filter
+_TOKEN_RE = re.compile(r'\b[a-z]{4,15}\b')
+
+@functools.lru_cache(maxsize=None)
+def _lda_stopwords() -> frozenset:
+    """gensim's stopword set, imported on first use like the rest of the LDA stack"""
+    from gensim.parsing.preprocessing import STOPWORDS
+    return frozenset(STOPWORDS)
+
+# Response class that renders with orjson; numpy values and timestamps are handled by encode_json
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return encode_json(content)
+
+# Volume reloads are shared by requests arriving within this many seconds of each other
+VOLUME_RELOAD_TTL = 5.0
+_last_reload = 0.0
+_reload_lock = asyncio.Lock()
+
+async def _maybe_reload(ttl: float = VOLUME_RELOAD_TTL):
+    """Reload the volume unless another request already did within the last ttl seconds"""
+    global _last_reload
+    if time.monotonic() - _last_reload <= ttl:
+        return
+    async with _reload_lock:
+        # Re-check: a request holding the lock may have just reloaded
+        if time.monotonic() - _last_reload > ttl:
+            await asyncio.to_thread(reload_volume)
+            _last_reload = time.monotonic()
+
+# Visualization payloads, raw and decoded, reused across requests while their stored version is unchanged
+# The budget counts serialized bytes; the decoded copy of a payload takes a few times more
+PARSED_CACHE_MAX_BYTES = 16 * 1024 * 1024
+_parsed_cache = OrderedDict()  # (repo, visualization_type) -> (version, data, data_json)
+_parsed_cache_bytes = 0
+
+def _drop_parsed(key: Tuple[str, str]) -> None:
+    """Forget a decoded payload and release its share of the budget"""
+    global _parsed_cache_bytes
+    entry = _parsed_cache.pop(key, None)
+    if entry is not None:
+        _parsed_cache_bytes -= len(entry[2])
+
+def get_visualization_payload(repo: str, visualization_type: str, max_age_hours: int = 24) -> Optional[Tuple[Any, bytes]]:
+    """Get (decoded data, serialized bytes) of a cached visualization, only reading the payload when it changed"""
+    global _parsed_cache_bytes
+    version = get_visualization_version(repo, visualization_type, max_age_hours)
+    key = (repo, visualization_type)
+    if version is None:
+        _drop_parsed(key)
+        return None
+    
+    entry = _parsed_cache.get(key)
+    if entry is not None and entry[0] == version:
+        _parsed_cache.move_to_end(key)
+        return entry[1], entry[2]
+    
+    data_json = get_visualization_data_json(repo, visualization_type, max_age_hours)
+    if data_json is None:
+        return None
+    try:
+        data = orjson.loads(data_json)
+    except orjson.JSONDecodeError:
+        logger.error(f"Error decoding JSON visualization data for {repo}")
+        return None
+    
+    # Evict least recently used payloads until the new one fits; oversized ones are not kept
+    _drop_parsed(key)
+    if len(data_json) <= PARSED_CACHE_MAX_BYTES:
+        while _parsed_cache and _parsed_cache_bytes + len(data_json) > PARSED_CACHE_MAX_BYTES:
+            _drop_parsed(next(iter(_parsed_cache)))
+        _parsed_cache[key] = (version, data, data_json)
+        _parsed_cache_bytes += len(data_json)
+    return data, data_json
+
+def raw_json_response(data_json: bytes) -> Response:
+    """Return an already-serialized JSON payload as is"""
+    return Response(content=data_json, media_type="application/json")
+
+def cached_json_response(data_json: bytes) -> Response:
+    """Wrap an already-serialized cached payload in the success envelope without decoding it"""
+    return Response(
+        content=b'{"status":"success","data":' + data_json + b',"source":"cache"}',
+        media_type="application/json"
+    )
 
 # Initialize database on startup
 @app.function(
@@ -72,9 +154,21 @@ class CustomJSONResponse(JSONResponse):
 )
 def init_database():
     """Initialize the SQLite database with required tables."""
-    volume.reload()
+    reload_volume()
+    init_db()
+    volume.commit()
+
+@app.function(
+    volumes={VOLUME_DIR: volume},
+    timeout=3600,
+)
+def reindex_embeddings():
+    """Re-embed stored issues with the current embedding model (modal run ...::reindex_embeddings)."""
+    reload_volume()
     init_db()
+    count = reindex_issue_embeddings()
     volume.commit()
+    logger.info(f"Reindexed {count} issue embeddings")
 
 @app.function(
     volumes={VOLUME_DIR: volume},
@@ -95,8 +189,8 @@ fastapi_app.add_middleware(
     expose_headers=["Content-Type"],
 )
 
-# Override the default response class
-fastapi_app.default_response_class = CustomJSONResponse
+# Override the default response class; routes take it from the router when they are declared
+fastapi_app.router.default_response_class = ORJSONResponse
 
 # Models
 class RepositoryAnalysisRequest(BaseModel):
@@ -125,22 +219,19 @@ def read_root():
 @fastapi_app.get("/api/repository/{repo:path}")
 async def get_repository_info_api(repo: str, force_refresh: bool = False, github_token: Optional[str] = None):
     """Get repository info with option to force refresh"""
-    print(f"GET /api/repository/{repo} - force_refresh: {force_refresh}")
-    logger = logging.getLogger(__name__)
     logger.info(f"Getting repository info for {repo}, force_refresh: {force_refresh}")
     
     # Check cache first if not forcing refresh
-    volume.reload()
+    await _maybe_reload()
     if not force_refresh:
-        cached_info = get_repository_info(repo)
+        cached_info = get_repository_info_json(repo)
         if cached_info:
             logger.info(f"Returning cached info for {repo}")
-            return {"status": "success", "data": cached_info, "source": "cache"}
+            return cached_json_response(cached_info)
     
     # If force refresh or not in cache, fetch from GitHub API
     try:
         logger.info(f"Fetching fresh data from GitHub API for {repo}")
-        print(f"Fetching data from GitHub API for {repo}")
         repo_info = get_info(repo, github_token)
         
         if not repo_info:
@@ -153,85 +244,67 @@ async def get_repository_info_api(repo: str, force_refresh: bool = False, github
         volume.commit()
         logger.info(f"Successfully fetched and cached info for {repo}")
         
-        return {"status": "success", "data": repo_info, "source": "api"}
+        return ORJSONResponse({"status": "success", "data": repo_info, "source": "api"})
     
     except Exception as e:
         error_msg = f"Error fetching repository info: {str(e)}"
         logger.error(error_msg)
-        print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 @fastapi_app.get("/api/insights/{repo:path}")
 async def get_repository_insights_api(repo: str, force_refresh: bool = False, github_token: Optional[str] = None):
     """Get repository insights with option to force refresh"""
-    print(f"GET /api/insights/{repo} - force_refresh: {force_refresh}")
-    logger = logging.getLogger(__name__)
     logger.info(f"Getting insights for {repo}, force_refresh: {force_refresh}")
     
-    # Get issues (either from cache or fresh)
-    issues_data = await get_issues_data(repo, force_refresh, github_token)
-    
     # Check visualization cache
-    volume.reload()
+    await _maybe_reload()
     if not force_refresh:
-        cached_insights = get_visualization_data(repo, "insights")
+        cached_insights = get_visualization_data_json(repo, "insights")
         if cached_insights:
             logger.info(f"Returning cached insights for {repo}")
-            return {"status": "success", "data": cached_insights, "source": "cache"}
+            return cached_json_response(cached_insights)
+    
+    # Get issues (either from cache or fresh); only needed when insights are generated
+    issues_data = await get_issues_data(repo, force_refresh, github_token)
     
     # Generate insights
     try:
         logger.info(f"Generating fresh insights for {repo}")
-        insights = prepare_repository_insights(issues_data)
+        insights = prepare_repository_insights(issues_data["data"])
         
         # Save to cache
         save_visualization_data(repo, "insights", insights)
         volume.commit()
         logger.info(f"Successfully generated and cached insights for {repo}")
         
-        return {"status": "success", "data": insights, "source": "generated"}
+        return ORJSONResponse({"status": "success", "data": insights, "source": "generated"})
     
     except Exception as e:
         error_msg = f"Error generating repository insights: {str(e)}"
         logger.error(error_msg)
-        print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 @fastapi_app.get("/api/issues/{repo:path}")
 async def get_repository_issues_api(repo: str, force_refresh: bool = False, github_token: Optional[str] = None):
     """Get repository issues with option to force refresh"""
-    print(f"GET /api/issues/{repo} - force_refresh: {force_refresh}")
-    return await get_issues_data(repo, force_refresh, github_token)
+    return ORJSONResponse(await get_issues_data(repo, force_refresh, github_token))
 
 async def get_issues_data(repo: str, force_refresh: bool = False, github_token: Optional[str] = None):
     """Helper function to get issues data"""
-    logger = logging.getLogger(__name__)
     logger.info(f"Getting issues for {repo}, force_refresh: {force_refresh}")
     
     # Check cache first if not forcing refresh
-    volume.reload()
+    await _maybe_reload()
     if not force_refresh:
+        # Rows come from the issues table, where id and issue_number are always set
         cached_issues = get_repository_issues(repo)
         if cached_issues:
-            cache_is_complete = True
-            for issue in cached_issues:
-                if not isinstance(issue, dict) or issue.get("id") is None or issue.get("number") is None:
-                    cache_is_complete = False
-                    break
-
-            if cache_is_complete:
-                logger.info(f"Returning cached issues for {repo}")
-                return {"status": "success", "data": cached_issues, "source": "cache"}
-
-            logger.warning(
-                "Cached issues for %s are missing required identifiers; fetching fresh data.",
-                repo,
-            )
+            logger.info(f"Returning cached issues for {repo}")
+            return {"status": "success", "data": cached_issues, "source": "cache"}
 
     # If force refresh or not in cache, fetch from GitHub API
     try:
         logger.info(f"Fetching fresh issues from GitHub API for {repo}")
-        print(f"Fetching issues from GitHub API for {repo}")
         issues = get_issues(repo, github_token)
         
         # Save to cache
@@ -244,7 +317,6 @@ async def get_issues_data(repo: str, force_refresh: bool = False, github_token:
     except Exception as e:
         error_msg = f"Error fetching repository issues: {str(e)}"
         logger.error(error_msg)
-        print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 # Original analyze endpoints for backward compatibility
@@ -258,187 +330,109 @@ async def analyze_issues(req: RepositoryAnalysisRequest):
     """Analyze issues from a GitHub repository"""
     return await get_repository_issues_api(req.repo, req.force_refresh, req.github_token)
 
-@fastapi_app.post("/visualize/wordcloud")
-async def get_wordcloud(req: RepositoryAnalysisRequest, field: str = Query("body")):
-    """Generate wordcloud data from repository issues"""
-    repo = req.repo
-    github_token = req.github_token
+def _load_issues(repo: str, github_token: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get repository issues from cache, fetching them from GitHub if needed"""
+    # First check if issues are in cache
+    issues_data = get_repository_issues(repo)
     
-    # Check visualization cache first
-    volume.reload()
-    visualization_type = f"wordcloud_{field}"
-    cached_data = get_visualization_data(repo, visualization_type)
-    
-    if cached_data:
-        return {"status": "success", "data": cached_data, "source": "cache"}
-    
-    # If not in cache, get issues and generate wordcloud
-    try:
-        # First check if issues are in cache
-        issues_data = get_repository_issues(repo)
+    if not issues_data:
+        # Fetch issues from GitHub API
+        logging.info(f"Fetching issues from GitHub API for repository: '{repo}'")
+        issues_data = get_issues(repo, github_token)
         
         if not issues_data:
-            # Fetch issues from GitHub API
-            issues_data = get_issues(repo, github_token)
-            
-            if not issues_data:
-                raise HTTPException(status_code=404, detail=f"No issues found for repository {repo}")
-            
-            # Save issues to cache
-            save_repository_issues(repo, issues_data)
-        
-        # Create pandas DataFrame from issues data
-        issues_df = pd.DataFrame(issues_data)
-        
-        # Generate wordcloud data
-        wordcloud_data = prepare_wordcloud_data(issues_df, field)
-        
-        if not wordcloud_data:
-            raise HTTPException(status_code=404, detail=f"Not enough text data for wordcloud visualization")
+            raise HTTPException(status_code=404, detail=f"No issues found for repository {repo}")
         
-        # Save visualization to cache
-        save_visualization_data(repo, visualization_type, wordcloud_data)
-        volume.commit()
-        
-        return {"status": "success", "data": wordcloud_data, "source": "generated"}
+        # Save issues to cache
+        save_repository_issues(repo, issues_data)
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating wordcloud: {str(e)}")
+    return issues_data
 
-@fastapi_app.post("/visualize/topics")
-async def get_topics(req: RepositoryAnalysisRequest, field: str = Query("body")):
-    """Generate topic modeling data from repository issues"""
-    repo = req.repo
-    github_token = req.github_token
-    
+async def _run_viz(repo: str, visualization_type: str, prepare_fn, github_token: Optional[str] = None,
+                   empty_detail: str = "Not enough data for visualization", error_label: str = "visualization"):
+    """Serve a visualization from cache, generating it from the repository issues on a miss"""
     # Check visualization cache first
-    volume.reload()
-    visualization_type = f"topics_{field}"
-    cached_data = get_visualization_data(repo, visualization_type)
+    await _maybe_reload()
+    cached_data = get_visualization_data_json(repo, visualization_type)
     
     if cached_data:
-        return {"status": "success", "data": cached_data, "source": "cache"}
+        return cached_json_response(cached_data)
     
-    # If not in cache, get issues and generate topics
+    # If not in cache, get issues and generate the visualization
     try:
-        # First check if issues are in cache
-        issues_data = get_repository_issues(repo)
-        
-        if not issues_data:
-            # Fetch issues from GitHub API
-            issues_data = get_issues(repo, github_token)
-            
-            if not issues_data:
-                raise HTTPException(status_code=404, detail=f"No issues found for repository {repo}")
-            
-            # Save issues to cache
-            save_repository_issues(repo, issues_data)
+        issues_data = _load_issues(repo, github_token)
         
-        # Create pandas DataFrame from issues data
-        issues_df = pd.DataFrame(issues_data)
+        visualization_data = prepare_fn(issues_data)
         
-        # Generate topic modeling data
-        topic_data = prepare_topic_modeling_data(issues_df, field)
-        
-        if not topic_data:
-            raise HTTPException(status_code=404, detail=f"Not enough text data for topic modeling")
+        if not visualization_data:
+            raise HTTPException(status_code=404, detail=empty_detail)
         
         # Save visualization to cache
-        save_visualization_data(repo, visualization_type, topic_data)
+        save_visualization_data(repo, visualization_type, visualization_data)
         volume.commit()
         
-        return {"status": "success", "data": topic_data, "source": "generated"}
+        return ORJSONResponse({"status": "success", "data": visualization_data, "source": "generated"})
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating topics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating {error_label}: {str(e)}")
+
+@fastapi_app.post("/visualize/wordcloud")
+async def get_wordcloud(req: RepositoryAnalysisRequest, field: str = Query("body")):
+    """Generate wordcloud data from repository issues"""
+    return await _run_viz(req.repo, f"wordcloud_{field}", lambda issues: prepare_wordcloud_data(issues, field), req.github_token,
+                          "Not enough text data for wordcloud visualization", "wordcloud")
+
+@fastapi_app.post("/visualize/topics")
+async def get_topics(req: RepositoryAnalysisRequest, field: str = Query("body")):
+    """Generate topic modeling data from repository issues"""
+    return await _run_viz(req.repo, f"topics_{field}", lambda issues: prepare_topic_modeling_data(issues, field), req.github_token,
+                          "Not enough text data for topic modeling", "topics")
 
 @fastapi_app.post("/visualize/insights")
 async def get_insights(req: RepositoryAnalysisRequest):
     """Generate repository insights from issues data"""
-    repo = req.repo
-    github_token = req.github_token
-    
-    # Check visualization cache first
-    volume.reload()
-    visualization_type = "insights"
-    cached_data = get_visualization_data(repo, visualization_type)
-    
-    if cached_data:
-        return {"status": "success", "data": cached_data, "source": "cache"}
-    
-    # If not in cache, get issues and generate insights
-    try:
-        # First check if issues are in cache
-        issues_data = get_repository_issues(repo)
-        
-        if not issues_data:
-            # Fetch issues from GitHub API
-            issues_data = get_issues(repo, github_token)
-            
-            if not issues_data:
-                raise HTTPException(status_code=404, detail=f"No issues found for repository {repo}")
-            
-            # Save issues to cache
-            save_repository_issues(repo, issues_data)
-        
-        # Create pandas DataFrame from issues data
-        issues_df = pd.DataFrame(issues_data)
-        
-        # Generate repository insights
-        insights_data = prepare_repository_insights(issues_df)
-        
-        if not insights_data:
-            raise HTTPException(status_code=404, detail=f"Could not generate insights from repository data")
-        
-        # Save visualization to cache
-        save_visualization_data(repo, visualization_type, insights_data)
-        volume.commit()
-        
-        return {"status": "success", "data": insights_data, "source": "generated"}
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
+    return await _run_viz(req.repo, "insights", prepare_repository_insights, req.github_token,
+                          "Could not generate insights from repository data", "insights")
 
 @fastapi_app.get("/cache/status/{repo:path}")
 async def check_cache_status(repo: str):
     """Check cache status for a repository"""
-    logger = logging.getLogger(__name__)
     logger.info(f"Checking cache status for {repo}")
     
     # Reload volume before accessing the database
     try:
-        volume.reload()
+        await _maybe_reload()
     except Exception as e:
         logger.error(f"Error reloading volume: {e}")
         # Continue anyway, as we might still be able to access the database
     
+    # One metadata query covers every cache entry; payloads are not loaded
+    manifest = get_cache_manifest(repo)
+    now = time.time()
+    
+    def is_cached(entry: str, max_age_hours: int = 24) -> bool:
+        last_updated, complete = manifest.get(entry, (0, False))
+        return complete and last_updated > now - max_age_hours * 3600
+    
     # Check if repository info is cached
-    repo_info_cached = get_repository_info(repo, max_age_hours=24) is not None
+    repo_info_cached = is_cached("repo_info")
     
     # Check if issues are cached
-    issues_cached = get_repository_issues(repo, max_age_hours=24) is not None
+    issues_cached = is_cached("issues")
     
     # Check what visualizations are cached
     cached_visualizations = {}
     
     # Standard visualizations
     for viz_type in ["wordcloud_body", "wordcloud_title", "topics_body", "topics_title", "insights"]:
-        cached_visualizations[viz_type] = get_visualization_data(repo, viz_type) is not None
+        cached_visualizations[viz_type] = is_cached(viz_type)
     
     # Nomic Atlas topics
     for field in ["body", "title"]:
         viz_type = f"nomic_atlas_topics_{field}"
-        # Use the 1-week cache expiration for Nomic Atlas data
-        cached_data = get_visualization_data(repo, viz_type, max_age_hours=168)
-        
-        # Only consider it cached if it's complete (not in processing or timeout state)
-        if cached_data and isinstance(cached_data, dict):
-            if cached_data.get("status") == "complete" or "status" not in cached_data:
-                cached_visualizations[viz_type] = True
-            else:
-                cached_visualizations[viz_type] = False
-        else:
-            cached_visualizations[viz_type] = False
+        # Use the 1-week cache expiration for Nomic Atlas data; only complete maps
+        # (not in processing or timeout state) count as cached
+        cached_visualizations[viz_type] = is_cached(viz_type, max_age_hours=168)
     
     # Add a simplified key for frontend compatibility
     cached_visualizations["nomic_atlas_topics"] = (
@@ -456,38 +450,17 @@ async def check_cache_status(repo: str):
 @fastapi_app.delete("/api/cache/{repo:path}")
 async def clear_cache(repo: str):
     """Clear all cached data for a repository for testing"""
-    logger = logging.getLogger(__name__)
     logger.info(f"Clearing cache for {repo}")
-    print(f"Clearing cache for {repo}")
     
     try:
-        # Connect to the database
-        volume.reload()
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Delete repo info
-        cursor.execute("DELETE FROM repository_data WHERE repo_name = ?", (repo,))
-        logger.info(f"Deleted repository data for {repo}")
-        
-        # Delete issues
-        cursor.execute("DELETE FROM repository_issues WHERE repo_name = ?", (repo,))
-        logger.info(f"Deleted repository issues for {repo}")
-        
-        # Delete visualization data
-        cursor.execute("DELETE FROM visualization_cache WHERE repo_name = ?", (repo,))
-        logger.info(f"Deleted visualization data for {repo}")
-        
-        # Commit changes
-        conn.commit()
-        conn.close()
+        await _maybe_reload()
+        clear_repository_cache(repo)
         volume.commit()
         
         return {"status": "success", "message": f"Cache cleared for {repo}"}
     except Exception as e:
         error_msg = f"Error clearing cache: {str(e)}"
         logger.error(error_msg)
-        print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 @fastapi_app.post("/cache/status")
@@ -505,94 +478,282 @@ async def post_ldavis(req: RepositoryAnalysisRequest, field: str = Query("body")
     """Generate and return pyLDAvis visualization for repository issues (POST method)"""
     return await get_ldavis(req.repo, field, req.force_refresh, req.github_token)
 
+# A background LDA job that has not reported back within this window is assumed dead
+LDAVIS_JOB_TIMEOUT_SECONDS = 900
+LDAVIS_POLL_SECONDS = 3
+
+# CPU cores reserved for compute_ldavis; LdaMulticore workers are sized to fit inside them
+LDAVIS_CPU = 4
+
+# Error page for LDA visualization failures; {context} is optional extra (already escaped) markup
+_LDAVIS_ERROR_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>LDA Visualization Error</title></head>
+<body>
+    <div style="color:red; text-align:center; padding:20px;">
+        <h2>Error Generating Visualization</h2>
+        <p>There was an error processing the data: {error}</p>
+        <p>Please try again or check your data.</p>
+        {context}
+    </div>
+</body>
+</html>
+"""
+
+def _ldavis_error_html(error: Exception, context: str = "") -> str:
+    """Render the LDA error page with the exception message escaped"""
+    return _LDAVIS_ERROR_TEMPLATE.format(error=html.escape(str(error)), context=context)
+
+def _store_row(rows: Optional[Dict[str, Any]], repo: str, visualization_type: str, data: Any):
+    """Collect a visualization cache row into rows, or save it right away when rows is None"""
+    if rows is None:
+        save_visualization_data(repo, visualization_type, data)
+    else:
+        rows[visualization_type] = data
+
+def _save_ldavis_rows(repo: str, rows: Dict[str, Any]):
+    """Store the rows returned by compute_ldavis and commit them from this container"""
+    for visualization_type, data in rows.items():
+        save_visualization_data(repo, visualization_type, data)
+    volume.commit()
+
+@app.function(
+    volumes={VOLUME_DIR: volume},
+    timeout=LDAVIS_JOB_TIMEOUT_SECONDS,
+    cpu=LDAVIS_CPU,
+)
+def compute_ldavis(issues_data: List[Dict[str, Any]], field: str, repo: str) -> Dict[str, Any]:
+    """Fit the LDA model and render pyLDAvis outside the web container.
+
+    The job only reads the database: it returns the visualization cache rows it produced,
+    including the job outcome, and the web container saves them. Each container writes its
+    own copy of the database file to the volume, so a second writer here would lose one
+    side's rows to whichever volume commit lands last.
+    """
+    reload_volume()
+    status_type = f"ldavis_{field}_status"
+    rows = {}
+    try:
+        logging.info(f"Generating LDA visualization for repository: '{repo}' with field: '{field}'")
+        html_data = generate_ldavis_html(issues_data, field, repo, rows)
+        if html_data:
+            rows[f"ldavis_{field}"] = html_data
+            rows[status_type] = {"status": "done", "finished_at": time.time()}
+        else:
+            rows[status_type] = {
+                "status": "failed",
+                "error": "Not enough text data for LDA visualization",
+                "finished_at": time.time()
+            }
+    except Exception as e:
+        logging.error(f"Error generating LDA visualization for '{repo}': {str(e)}")
+        rows[status_type] = {"status": "failed", "error": str(e), "finished_at": time.time()}
+    # Persists the LDA input files under LDA_CACHE_DIR; the database file is left untouched
+    volume.commit()
+    return rows
+
+def _ldavis_placeholder(repo: str, field: str) -> HTMLResponse:
+    """202 page that reloads the visualization URL until the background job has stored it"""
+    poll_url = f"/visualize/ldavis?repo={quote(repo, safe='')}&field={quote(field, safe='')}"
+    placeholder_html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>LDA Visualization</title>
+        <meta http-equiv="refresh" content="{LDAVIS_POLL_SECONDS};url={html.escape(poll_url)}">
+    </head>
+    <body>
+        <div style="text-align:center; padding:20px;">
+            <h2>Generating Visualization</h2>
+            <p>Topic modeling for {html.escape(repo)} is running. This page refreshes automatically.</p>
+        </div>
+    </body>
+    </html>
+    """
+    return HTMLResponse(
+        content=placeholder_html,
+        status_code=202,
+        headers={"Retry-After": str(LDAVIS_POLL_SECONDS), "Location": poll_url}
+    )
+
 @fastapi_app.get("/visualize/ldavis")
 async def get_ldavis(repo: str, field: str = Query("body"), force_refresh: bool = False, github_token: Optional[str] = None):
-    """Generate and return pyLDAvis visualization for repository issues"""
-    # Check visualization cache first (optional - you might want to always regenerate)
-    volume.reload()
+    """Return the pyLDAvis visualization, starting a background job to generate it when not cached"""
+    await _maybe_reload()
     visualization_type = f"ldavis_{field}"
-    cached_data = get_visualization_data(repo, visualization_type)
+    status_type = f"ldavis_{field}_status"
+    
+    # A running job takes precedence, so forced refreshes keep polling until the new page is stored
+    job = get_visualization_data(repo, status_type)
+    if job and job.get("status") == "running" and time.time() - job.get("started_at", 0) < LDAVIS_JOB_TIMEOUT_SECONDS:
+        if not job.get("call_id"):
+            return _ldavis_placeholder(repo, field)
+        try:
+            rows = await FunctionCall.from_id(job["call_id"]).get.aio(timeout=0)
+        except Exception as e:
+            # A job still running times out the zero-second wait; expired output subclasses that error
+            if isinstance(e, ModalTimeoutError) and not isinstance(e, OutputExpiredError):
+                return _ldavis_placeholder(repo, field)
+            logging.error(f"LDA visualization job for '{repo}' did not complete: {str(e)}")
+            rows = {status_type: {"status": "failed", "error": str(e), "finished_at": time.time()}}
+        # The job has finished: this container is the one that stores its results
+        _save_ldavis_rows(repo, rows)
+        job = rows.get(status_type)
+        force_refresh = False
     
-    if cached_data and not force_refresh:
-        # For HTML response, we need to wrap the cached html in a proper response
-        return HTMLResponse(content=cached_data, status_code=200)
+    if not force_refresh:
+        cached_data = get_visualization_data(repo, visualization_type)
+        if cached_data:
+            # For HTML response, we need to wrap the cached html in a proper response
+            return HTMLResponse(content=cached_data, status_code=200)
     
-    # If not in cache or forcing refresh, get issues and generate visualization
     try:
-        logging.info(f"Generating LDA visualization for repository: '{repo}' with field: '{field}'")
-        # First check if issues are in cache
-        issues_data = get_repository_issues(repo)
-        
-        if not issues_data:
-            # Fetch issues from GitHub API
-            logging.info(f"Fetching issues from GitHub API for repository: '{repo}'")
-            issues_data = get_issues(repo, github_token)
-            
-            if not issues_data:
-                raise HTTPException(status_code=404, detail=f"No issues found for repository {repo}")
-            
-            # Save issues to cache
-            save_repository_issues(repo, issues_data)
-        
-        # Create pandas DataFrame from issues data
-        issues_df = pd.DataFrame(issues_data)
-        
-        # Add repo column to dataframe to ensure it's available for the visualization
-        issues_df['repo'] = repo
-        logging.info(f"Added 'repo' column to dataframe with value: '{repo}'")
-        
-        # Generate pyLDAvis visualization - explicitly pass the repo name
-        html_data = generate_ldavis_html(issues_df, field, repo)
-        
-        if not html_data:
-            raise HTTPException(status_code=404, detail=f"Not enough text data for LDA visualization")
-        
-        # Save visualization to cache
-        save_visualization_data(repo, visualization_type, html_data)
+        if job and job.get("status") == "failed" and not force_refresh:
+            # Report the failure once; the next request starts a fresh job
+            save_visualization_data(repo, status_type, {"status": "reported", "finished_at": time.time()})
+            volume.commit()
+            raise HTTPException(status_code=404, detail=job.get("error", "LDA visualization failed"))
+        
+        issues_data = _load_issues(repo, github_token)
+        
+        # Mark the job with its call id and commit so other containers poll the same job
+        started_at = time.time()
+        call = compute_ldavis.spawn(issues_data, field, repo)
+        save_visualization_data(repo, status_type, {"status": "running", "started_at": started_at, "call_id": call.object_id})
         volume.commit()
+        logging.info(f"Started background LDA visualization for repository: '{repo}' with field: '{field}'")
         
-        return HTMLResponse(
-            content=html_data, 
-            status_code=200,
-            headers={"Content-Type": "text/html; charset=utf-8"}
-        )
+        return _ldavis_placeholder(repo, field)
     
     except Exception as e:
         logging.error(f"Error generating LDA visualization: {str(e)}")
         # Return a user-friendly error page instead of an exception
-        error_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head><title>LDA Visualization Error</title></head>
-        <body>
-            <div style="color:red; text-align:center; padding:20px;">
-                <h2>Error Generating Visualization</h2>
-                <p>There was an error processing the data: {str(e)}</p>
-                <p>Please try again or check your data.</p>
-                <p><small>Repository: {repo}, Field: {field}</small></p>
-            </div>
-        </body>
-        </html>
-        """
+        error_html = _ldavis_error_html(e, f"<p><small>Repository: {html.escape(repo)}, Field: {html.escape(field)}</small></p>")
         return HTMLResponse(
             content=error_html,
             status_code=500,
             headers={"Content-Type": "text/html; charset=utf-8"}
         )
 
-def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name: str = None) -> str:
-    """Generate pyLDAvis HTML visualization from issues dataframe"""
+# Page wrapped around the pyLDAvis output; __BODY__ is replaced with the rendered visualization
+_LDAVIS_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>LDA Topic Visualization</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; }
+        #loading { display: none; text-align: center; padding: 20px; }
+        #error { display: none; color: red; text-align: center; padding: 20px; }
+        #ldavis_container { opacity: 0; transition: opacity 0.5s; }
+    </style>
+</head>
+<body>
+    <div id="loading">Loading visualization...</div>
+    <div id="error">Error loading visualization. Please refresh the page.</div>
+    __BODY__
+    <script>
+        // Ensure proper loading and error handling
+        window.onload = function() {
+            console.log("Page loaded, checking LDAvis status...");
+            setTimeout(function() {
+                var loading = document.getElementById('loading');
+                var error = document.getElementById('error');
+                var container = document.getElementById('ldavis_container');
+                
+                if (typeof LDAvis === 'object' && container) {
+                    console.log('LDAvis loaded successfully');
+                    loading.style.display = 'none';
+                    error.style.display = 'none';
+                    container.style.opacity = '1';
+                    
+                    // Force resize event to ensure proper rendering
+                    window.dispatchEvent(new Event('resize'));
+                } else {
+                    console.error('LDAvis loading issue detected');
+                    loading.style.display = 'none';
+                    error.style.display = 'block';
+                }
+            }, 1000);
+        };
+        
+        // Show loading indicator initially
+        document.getElementById('loading').style.display = 'block';
+    </script>
+</body>
+</html>
+"""
+
+# A visualization whose corpus fingerprint still matches is content-addressed, so it can be kept longer
+LDAVIS_FINGERPRINT_CACHE_HOURS = 168
+
+def _corpus_fingerprint(processed_texts: List[List[str]]) -> str:
+    """Short content hash of the tokenized corpus the LDA model is trained on"""
+    digest = hashlib.blake2b(digest_size=12)
+    for tokens in processed_texts:
+        digest.update(" ".join(tokens).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+# Below this many documents, worker process startup outweighs parallel LDA training
+LDA_MULTICORE_MIN_DOCS = 200
+
+# Dictionaries and bag-of-words corpora kept on the volume, one pair per repository and field
+LDA_CACHE_DIR = os.path.join(VOLUME_DIR, "lda_cache")
+
+def _load_lda_inputs(processed_texts: List[List[str]], repo_name: str, field: str, corpus_fp: str):
+    """Dictionary and corpus for the tokenized texts, reusing the copy saved for the same fingerprint"""
+    import gensim.corpora
+    
+    prefix = os.path.join(LDA_CACHE_DIR, f"{repo_name.replace('/', '__')}_{field}")
+    dict_path = f"{prefix}_{corpus_fp}.dict"
+    mm_path = f"{prefix}_{corpus_fp}.mm"
+    
+    if os.path.exists(dict_path) and os.path.exists(mm_path):
+        try:
+            dictionary = gensim.corpora.Dictionary.load(dict_path)
+            corpus = list(gensim.corpora.MmCorpus(mm_path))
+            logging.info(f"Loaded LDA dictionary and corpus for {corpus_fp} from the volume")
+            return dictionary, corpus
+        except Exception as e:
+            logging.warning(f"Could not load saved LDA inputs, rebuilding: {e}")
+    
+    logging.info("Creating dictionary and corpus for LDA model")
+    dictionary = gensim.corpora.Dictionary(processed_texts)
+    
+    # Filter extremes to improve quality (optional)
+    dictionary.filter_extremes(no_below=2, no_above=0.9)
+    
+    corpus = [dictionary.doc2bow(text) for text in processed_texts]
+    
+    # Saved files are committed with the volume by the compute_ldavis job
     try:
-        if field not in issues_df.columns:
-            logging.error(f"Invalid field for LDA visualization: {field}")
-            return ""
+        os.makedirs(LDA_CACHE_DIR, exist_ok=True)
+        # Only the latest corpus of a repository and field is worth keeping
+        for stale_path in glob.glob(f"{glob.escape(prefix)}_*"):
+            os.remove(stale_path)
+        dictionary.save(dict_path)
+        gensim.corpora.MmCorpus.serialize(mm_path, corpus)
+    except OSError as e:
+        logging.warning(f"Could not save LDA inputs to the volume: {e}")
     
+    return dictionary, corpus
+
+def generate_ldavis_html(issues: Union[pd.DataFrame, List[Dict[str, Any]]], field: str = "body", repo_name: str = None,
+                         rows: Optional[Dict[str, Any]] = None) -> str:
+    """Generate pyLDAvis HTML visualization from issue dicts or an issues dataframe.
+
+    The topic data and corpus fingerprint produced alongside the page are collected into
+    rows when it is given, for the caller to store; otherwise they are saved directly.
+    """
+    try:
         # Ensure we have a valid repository name
         if not repo_name:
             logging.warning("Repository name not provided as parameter, attempting to extract from dataframe")
             try:
-                if 'repo' in issues_df.columns and not issues_df.empty:
-                    repo_name = issues_df.iloc[0]['repo']
+                if isinstance(issues, pd.DataFrame) and 'repo' in issues.columns and not issues.empty:
+                    repo_name = issues.iloc[0]['repo']
                     logging.info(f"Successfully extracted repo name from dataframe: '{repo_name}'")
                 else:
                     logging.warning("Repository name not available in dataframe")
@@ -606,7 +767,7 @@ def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name
             logging.info(f"Using provided repository name: '{repo_name}'")
     
         # Use the selected field for topic modeling
-        data = [text for text in issues_df[field].tolist() if text and isinstance(text, str)]
+        data = extract_field(issues, field)
         
         if not data or len(data) < 5:  # Need at least a few documents for meaningful topics
             logging.warning(f"Not enough {field} data available for LDA visualization (found {len(data)} valid entries)")
@@ -614,18 +775,15 @@ def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name
     
         # Clean the text: remove URLs, non-alphabetic characters, extra whitespace, convert to lower case
         logging.info(f"Processing {len(data)} documents for LDA visualization")
-        cleaned_data = []
-        for text in data:
-            try:
-                cleaned_text = re.sub(r'https?://\S+', '', text)  # remove URLs
-                cleaned_text = re.sub(r'[^a-zA-Z\s]', ' ', cleaned_text)  # remove non-alphabetic characters
-                cleaned_text = re.sub(r'\s+', ' ', cleaned_text)  # collapse multiple spaces
-                cleaned_text = cleaned_text.lower().strip()
-                if len(cleaned_text) > 10:  # Only keep if there's meaningful content
-                    cleaned_data.append(cleaned_text)
-            except Exception as e:
-                logging.warning(f"Error cleaning text: {str(e)}")
-                continue
+        cleaned = (
+            pd.Series(data, dtype=object)
+            .str.replace(_URL_RE, '', regex=True)  # remove URLs
+            .str.replace(_NON_ALPHA_RE, ' ', regex=True)  # remove non-alphabetic characters
+            .str.replace(_WS_RE, ' ', regex=True)  # collapse multiple spaces
+            .str.lower()
+            .str.strip()
+        )
+        cleaned_data = cleaned[cleaned.str.len() > 10].tolist()  # Only keep if there's meaningful content
         
         if len(cleaned_data) < 5:
             logging.warning(f"Not enough cleaned text data for LDA (only {len(cleaned_data)} documents after processing)")
@@ -633,40 +791,63 @@ def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name
     
         # Preprocess texts: tokenize and remove stopwords
         logging.info("Tokenizing and preprocessing texts for LDA")
+        stopwords = _lda_stopwords()
         processed_texts = []
         for text in cleaned_data:
-            try:
-                tokens = [word for word in simple_preprocess(text) if word not in STOPWORDS and len(word) > 3]
-                if tokens:
-                    processed_texts.append(tokens)
-            except Exception as e:
-                logging.warning(f"Error processing tokens: {str(e)}")
-                continue
+            tokens = [word for word in _TOKEN_RE.findall(text) if word not in stopwords]
+            if tokens:
+                processed_texts.append(tokens)
         
         if len(processed_texts) < 5 or not any(processed_texts):
             logging.warning(f"Not enough processed texts for LDA (only {len(processed_texts)} valid documents)")
             return ""
+        
+        # Unchanged text yields the same visualization: reuse the stored ldavis_{field} page
+        # instead of refitting, as long as it and the topic data saved alongside it are still
+        # within the fingerprint window. Both have usually left the regular 24h cache by now,
+        # so the topic row is stored again to serve it fresh; the caller stores the page.
+        corpus_fp = _corpus_fingerprint(processed_texts)
+        fingerprint_type = f"ldavis_{field}_fingerprint"
+        topics_type = f"topics_from_ldavis_{field}"
+        saved_fp = get_visualization_data(repo_name, fingerprint_type, max_age_hours=LDAVIS_FINGERPRINT_CACHE_HOURS)
+        if saved_fp and saved_fp.get("fingerprint") == corpus_fp:
+            cached_html = get_visualization_data(repo_name, f"ldavis_{field}", max_age_hours=LDAVIS_FINGERPRINT_CACHE_HOURS)
+            cached_topics = get_visualization_data(repo_name, topics_type, max_age_hours=LDAVIS_FINGERPRINT_CACHE_HOURS)
+            if cached_html and cached_topics:
+                logging.info(f"Reusing LDA visualization for unchanged corpus {corpus_fp}")
+                _store_row(rows, repo_name, topics_type, cached_topics)
+                return cached_html
     
         # Create a dictionary and corpus for LDA
-        logging.info("Creating dictionary and corpus for LDA model")
-        dictionary = gensim.corpora.Dictionary(processed_texts)
-        
-        # Filter extremes to improve quality (optional)
-        dictionary.filter_extremes(no_below=2, no_above=0.9)
-        
-        corpus = [dictionary.doc2bow(text) for text in processed_texts]
+        dictionary, corpus = _load_lda_inputs(processed_texts, repo_name, field, corpus_fp)
         
         if not corpus or len(corpus) < 5:
             logging.warning(f"Insufficient corpus size for LDA: {len(corpus)} documents")
             return ""
     
+        # gensim and pyLDAvis take seconds to import, so they are loaded when a model is
+        # actually fit rather than on every cold start
+        import gensim.models.ldamodel
+        import gensim.models.ldamulticore
+        import pyLDAvis
+        import pyLDAvis.gensim_models
+        
         # Build the LDA model
         num_topics = min(5, len(corpus) // 5) if len(corpus) > 10 else 2
         logging.info(f"Building LDA model with {num_topics} topics")
-        lda_model = gensim.models.ldamodel.LdaModel(
-            corpus, num_topics=num_topics, id2word=dictionary, 
-            passes=15, alpha='auto', eta='auto', random_state=42
-        )
+        if len(corpus) >= LDA_MULTICORE_MIN_DOCS:
+            # LdaMulticore cannot learn alpha, so it uses a symmetric prior instead of alpha='auto'
+            lda_model = gensim.models.ldamulticore.LdaMulticore(
+                corpus, num_topics=num_topics, id2word=dictionary,
+                passes=15, alpha='symmetric', eta='auto', random_state=42,
+                # The host's cpu_count overstates a container's share; one core stays with the master process
+                workers=max(1, min(LDAVIS_CPU, len(os.sched_getaffinity(0))) - 1), chunksize=2000
+            )
+        else:
+            lda_model = gensim.models.ldamodel.LdaModel(
+                corpus, num_topics=num_topics, id2word=dictionary, 
+                passes=15, alpha='auto', eta='auto', random_state=42
+            )
         
         # Store corpus and dictionary for later use
         lda_model.corpus = corpus  # Store corpus in the model
@@ -677,7 +858,7 @@ def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name
         lda_vis = pyLDAvis.gensim_models.prepare(lda_model, corpus, dictionary)
         
         # Also save the structured topic data to use in the frontend
-        save_topic_data(lda_vis, lda_model, dictionary, field, repo_name)
+        save_topic_data(lda_vis, lda_model, dictionary, field, repo_name, rows)
         
         # Create HTML with CDNJS resources to ensure it works in any environment
         logging.info("Generating HTML for visualization")
@@ -687,80 +868,25 @@ def generate_ldavis_html(issues_df: pd.DataFrame, field: str = "body", repo_name
             ldavis_url="https://cdn.jsdelivr.net/gh/bmabey/pyLDAvis@2.1.2/pyLDAvis/js/ldavis.v1.0.0.js",
             ldavis_css_url="https://cdn.jsdelivr.net/gh/bmabey/pyLDAvis@2.1.2/pyLDAvis/css/ldavis.css",
             template_type="general",
-            visid=f"ldavis_{field}_{hash(str(corpus))%10000}"
+            visid=f"ldavis_{field}_{uuid.uuid4().hex[:8]}"
         )
         
         # Create a more robust HTML document with better error handling
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>LDA Topic Visualization</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1">
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; }}
-                #loading {{ display: none; text-align: center; padding: 20px; }}
-                #error {{ display: none; color: red; text-align: center; padding: 20px; }}
-                #ldavis_container {{ opacity: 0; transition: opacity 0.5s; }}
-            </style>
-        </head>
-        <body>
-            <div id="loading">Loading visualization...</div>
-            <div id="error">Error loading visualization. Please refresh the page.</div>
-            {html_string}
-            <script>
-                // Ensure proper loading and error handling
-                window.onload = function() {{
-                    console.log("Page loaded, checking LDAvis status...");
-                    setTimeout(function() {{
-                        var loading = document.getElementById('loading');
-                        var error = document.getElementById('error');
-                        var container = document.getElementById('ldavis_container');
-                        
-                        if (typeof LDAvis === 'object' && container) {{
-                            console.log('LDAvis loaded successfully');
-                            loading.style.display = 'none';
-                            error.style.display = 'none';
-                            container.style.opacity = '1';
-                            
-                            // Force resize event to ensure proper rendering
-                            window.dispatchEvent(new Event('resize'));
-                        }} else {{
-                            console.error('LDAvis loading issue detected');
-                            loading.style.display = 'none';
-                            error.style.display = 'block';
-                        }}
-                    }}, 1000);
-                }};
-                
-                // Show loading indicator initially
-                document.getElementById('loading').style.display = 'block';
-            </script>
-        </body>
-        </html>
-        """
+        full_html = _LDAVIS_TEMPLATE.replace("__BODY__", html_string)
         
+        # The page itself is stored as ldavis_{field} by the caller; only its fingerprint is kept here
+        _store_row(rows, repo_name, fingerprint_type, {"fingerprint": corpus_fp})
         return full_html
     except Exception as e:
         logging.error(f"Error preparing LDA visualization: {str(e)}")
         # Return an error HTML page that will trigger the onLoad event in the iframe
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head><title>LDA Visualization Error</title></head>
-        <body>
-            <div style="color:red; text-align:center; padding:20px;">
-                <h2>Error Generating Visualization</h2>
-                <p>There was an error processing the data: {str(e)}</p>
-                <p>Please try again or check your data.</p>
-            </div>
-        </body>
-        </html>
-        """
+        return _ldavis_error_html(e)
+
+# Terms kept per topic in the exported topic-term distributions
+TOPIC_TERM_TOP_K = 200
 
-def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
-    """Extract and save topic data from pyLDAvis for use in the frontend"""
+def save_topic_data(lda_vis, lda_model, dictionary, field, repo, rows=None):
+    """Extract and save topic data from pyLDAvis for use in the frontend, or collect it into rows"""
     try:
         # Ensure we have a valid repo name
         if not repo:
@@ -778,6 +904,9 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
         # Get topic coordinates and sizes from pyLDAvis
         mds_coords = lda_vis.topic_coordinates
         logging.info(f"Got MDS coordinates with shape: {mds_coords.shape}")
+        # Positional Python floats, so the topic loop needs no per-topic iloc lookups
+        mds_x = mds_coords['x'].to_numpy(dtype=np.float64).tolist()
+        mds_y = mds_coords['y'].to_numpy(dtype=np.float64).tolist()
         
         # Get vocabulary - handle both old and new pyLDAvis API versions
         try:
@@ -792,6 +921,7 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
                 vocab = [dictionary[id] for id in range(len(dictionary))]
                 logging.info("Using fallback dictionary vocabulary")
             
+            vocab_index = {word: i for i, word in enumerate(vocab)}
             logging.info(f"Successfully loaded vocabulary with {len(vocab)} terms")
         except Exception as e:
             logging.error(f"Error accessing vocabulary: {str(e)}")
@@ -806,18 +936,11 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
                 term_frequency = lda_vis.token.term_frequency
                 logging.info("Using token.term_frequency attribute")
             else:
-                # Compute term frequencies from the corpus
+                # Compute term frequencies from the corpus stored on the model
                 logging.info("Computing term frequencies from corpus")
-                term_frequency = np.zeros(len(vocab))
-                if hasattr(lda_model, 'corpus'):
-                    for doc in lda_model.corpus:
-                        for term_id, freq in doc:
-                            term_frequency[term_id] += freq
-                else:
-                    # If no corpus stored, compute from the current corpus
-                    for doc in corpus:
-                        for term_id, freq in doc:
-                            term_frequency[term_id] += freq
+                corpus = getattr(lda_model, 'corpus', None) or []
+                pairs = np.array([pair for doc in corpus for pair in doc], dtype=np.float64).reshape(-1, 2)
+                term_frequency = np.bincount(pairs[:, 0].astype(np.int64), weights=pairs[:, 1], minlength=len(vocab))
                 logging.info(f"Computed term frequencies for {len(term_frequency)} terms")
             
             logging.info(f"Successfully loaded term frequencies for {len(term_frequency)} terms")
@@ -825,27 +948,31 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
             logging.error(f"Error accessing term frequencies: {str(e)}")
             raise
         
+        # Split pyLDAvis topic_info by category once instead of filtering it for every topic
+        topic_info_groups = {}
+        if hasattr(lda_vis, 'topic_info'):
+            topic_info_groups = {category: group for category, group in lda_vis.topic_info.groupby('Category', sort=False)}
+        
         for topic_id in range(num_topics_to_extract):
             logging.info(f"Processing topic {topic_id}")
             
             # Get topic info from pyLDAvis DataFrame if available
             topic_words = []
-            if hasattr(lda_vis, 'topic_info'):
-                # Filter topic_info for this topic
-                topic_terms = lda_vis.topic_info[lda_vis.topic_info['Category'] == f'Topic{topic_id + 1}']
-                if not topic_terms.empty:
-                    logging.info(f"Found {len(topic_terms)} terms for topic {topic_id} in topic_info")
-                    for _, row in topic_terms.iterrows():
-                        try:
-                            topic_words.append({
-                                "text": str(row['Term']),  # Ensure term is string
-                                "value": float(row['Freq']) if 'Freq' in row else 1.0,  # Term frequency in topic
-                                "probability": float(row['logprob']) if 'logprob' in row else 0.0,  # Log probability
-                                "loglift": float(row['loglift']) if 'loglift' in row else 0.0  # Log lift (distinctiveness)
-                            })
-                        except Exception as e:
-                            logging.warning(f"Error processing topic term: {str(e)}")
-                            continue
+            topic_terms = topic_info_groups.get(f'Topic{topic_id + 1}')
+            if topic_terms is not None and not topic_terms.empty:
+                logging.info(f"Found {len(topic_terms)} terms for topic {topic_id} in topic_info")
+                # Read whole columns rather than building a Series per row
+                n_terms = len(topic_terms)
+                term_values = topic_terms['Term'].to_numpy()
+                freq_values = topic_terms['Freq'].to_numpy(dtype=np.float64) if 'Freq' in topic_terms else np.ones(n_terms)  # Term frequency in topic
+                logprob_values = topic_terms['logprob'].to_numpy(dtype=np.float64) if 'logprob' in topic_terms else np.zeros(n_terms)  # Log probability
+                loglift_values = topic_terms['loglift'].to_numpy(dtype=np.float64) if 'loglift' in topic_terms else np.zeros(n_terms)  # Log lift (distinctiveness)
+                topic_words = [
+                    {"text": str(term), "value": freq, "probability": logprob, "loglift": loglift}
+                    for term, freq, logprob, loglift in zip(
+                        term_values, freq_values.tolist(), logprob_values.tolist(), loglift_values.tolist()
+                    )
+                ]
             
             # If no topic_info or if we couldn't get words, fall back to LDA model's show_topic
             if not topic_words:
@@ -870,12 +997,10 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
                                 continue
                                 
                             # Get the frequency information from LDAvis if available
-                            term_freq = 0
-                            try:
-                                term_index = vocab.index(word)
+                            term_index = vocab_index.get(word)
+                            if term_index is not None:
                                 term_freq = int(term_frequency[term_index])
-                            except (ValueError, IndexError, AttributeError) as e:
-                                logging.debug(f"Could not get frequency for word '{word}': {str(e)}")
+                            else:
                                 term_freq = int(max(1, prob * 1000))  # Use probability-based fallback
                             
                             topic_words.append({
@@ -901,11 +1026,10 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
             # Get the topic weight/prevalence if available
             topic_weight = 1.0
             try:
-                if hasattr(lda_vis, 'topic_info') and 'Freq' in lda_vis.topic_info.columns:
+                if topic_terms is not None and 'Freq' in topic_terms.columns:
                     # Get the topic frequency from pyLDAvis if available
-                    topic_info = lda_vis.topic_info[lda_vis.topic_info['Category'] == 'Topic' + str(topic_id + 1)]
-                    if not topic_info.empty:
-                        topic_weight = float(topic_info['Freq'].iloc[0])
+                    if not topic_terms.empty:
+                        topic_weight = float(topic_terms['Freq'].iloc[0])
                 elif hasattr(lda_model, 'get_topic_dist'):
                     # Or try to get it directly from the model
                     dist = lda_model.get_topic_dist()
@@ -918,8 +1042,8 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
             logging.info(topic_description)
             
             # Get topic coordinates from pyLDAvis
-            x = float(mds_coords.iloc[topic_id]['x'])
-            y = float(mds_coords.iloc[topic_id]['y'])
+            x = mds_x[topic_id]
+            y = mds_y[topic_id]
             
             topic_data.append({
                 "id": topic_id,
@@ -934,31 +1058,25 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
         
         # Get term information - we already have vocab and term_frequency from above
         terms = list(vocab)
-        term_frequency_list = [float(f) for f in term_frequency]
-        topic_term_dists = []
+        term_frequency_list = np.asarray(term_frequency, dtype=np.float64)
         
         logging.info(f"Got {len(terms)} terms and {len(term_frequency_list)} term frequencies")
         
-        # Get topic-term distributions for each topic
-        for topic_id in range(num_topics_to_extract):
-            dist = []
-            for term_id in range(len(terms)):
-                try:
-                    # Get probability from the model - handle the case where term might not appear in topic
-                    term_topics = lda_model.get_term_topics(term_id, minimum_probability=0)
-                    # term_topics is a list of (topic_id, probability) tuples
-                    prob = 0.0
-                    for t_id, t_prob in term_topics:
-                        if t_id == topic_id:
-                            prob = t_prob
-                            break
-                    dist.append(float(prob))
-                except (IndexError, KeyError, TypeError) as e:
-                    logging.debug(f"Error getting probability for term {term_id} in topic {topic_id}: {str(e)}")
-                    dist.append(0.0)
-            topic_term_dists.append(dist)
+        # Get topic-term distributions for all topics at once (K x V, in dictionary id order)
+        topic_term_matrix = lda_model.get_topics()
+        id_order = np.fromiter((dictionary.token2id[term] for term in terms), dtype=np.int64, count=len(terms))
+        topic_term_matrix = topic_term_matrix[:, id_order]
         
-        logging.info(f"Generated topic-term distributions with shape: {len(topic_term_dists)}x{len(topic_term_dists[0]) if topic_term_dists else 0}")
+        # Only each topic's most probable terms are sent, as {term_ids, probs}; the frontend
+        # treats every other term as zero probability
+        top_k = min(TOPIC_TERM_TOP_K, topic_term_matrix.shape[1])
+        top_ids = np.argpartition(-topic_term_matrix, top_k - 1, axis=1)[:, :top_k]
+        topic_term_dists = [
+            {"term_ids": ids, "probs": topic_term_matrix[topic_id, ids]}
+            for topic_id, ids in enumerate(top_ids)
+        ]
+        
+        logging.info(f"Kept top {top_k} of {topic_term_matrix.shape[1]} terms for {len(topic_term_dists)} topic-term distributions")
         
         # Create the complete visualization data
         vis_data = {
@@ -977,7 +1095,8 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
         logging.info(f"Number of topics: {len(vis_data['topics'])}")
         logging.info(f"Number of terms: {len(vis_data['terms'])}")
         
-        save_visualization_data(repo, visualization_type, json.dumps(vis_data, cls=NumpyJSONEncoder))
+        # Stored as JSON directly; the numpy arrays are serialized by orjson without conversion
+        _store_row(rows, repo, visualization_type, vis_data)
         return vis_data
         
     except Exception as e:
@@ -987,51 +1106,69 @@ def save_topic_data(lda_vis, lda_model, dictionary, field, repo):
             if repo:  # Only try to save if we have a repo name
                 visualization_type = f"topics_from_ldavis_{field}"
                 error_data = {"error": str(e), "topics": [], "terms": [], "term_frequency": [], "topic_term_dists": []}
-                save_visualization_data(repo, visualization_type, json.dumps(error_data, cls=NumpyJSONEncoder))
+                _store_row(rows, repo, visualization_type, error_data)
                 logging.info(f"Saved error data for repository: '{repo}'")
         except Exception as inner_e:
             logging.error(f"Failed to save error data: {str(inner_e)}")
         return None
 
+def _parse_topic_data(cached_data) -> Dict[str, Any]:
+    """Topic data from the cache; entries written before it was stored as plain JSON hold a JSON string"""
+    if isinstance(cached_data, str):
+        return json.loads(cached_data)
+    return cached_data
+
 @fastapi_app.get("/visualize/topics-from-ldavis")
 async def get_topics_from_ldavis(repo: str, field: str = Query("body"), force_refresh: bool = False, github_token: Optional[str] = None):
     """Get topic data extracted from pyLDAvis"""
     try:
         logging.info(f"Getting topics from LDAvis for repo: {repo}, field: {field}")
-        volume.reload()
+        await _maybe_reload()
         visualization_type = f"topics_from_ldavis_{field}"
-        cached_data = get_visualization_data(repo, visualization_type)
+        cached = get_visualization_payload(repo, visualization_type)
         
-        if cached_data and not force_refresh:
+        if cached and cached[0] and not force_refresh:
             logging.info("Found cached topic data")
+            cached_data, cached_json = cached
+            if isinstance(cached_data, dict):
+                # Stored as plain JSON: send the bytes without re-serializing them
+                return raw_json_response(cached_json)
             # Parse the cached data to ensure it's valid JSON
             try:
-                parsed_data = json.loads(cached_data)
+                parsed_data = _parse_topic_data(cached_data)
                 logging.info(f"Cached data contains: {list(parsed_data.keys())}")
-                return CustomJSONResponse(content=parsed_data)
+                return ORJSONResponse(content=parsed_data)
             except json.JSONDecodeError as e:
                 logging.error(f"Error parsing cached data: {e}")
                 # If cached data is invalid, continue to regenerate
                 force_refresh = True
         
-        # If we need to generate the data, we'll use the ldavis endpoint which will save the topic data 
-        # through the save_topic_data function
+        # If we need to generate the data, compute_ldavis returns the topic data extracted by
+        # save_topic_data along with the page, and they are stored here
         logging.info(f"No cached topic data found or force refresh requested for repository: '{repo}', generating new data")
-        # This will generate the LDA visualization and also save topic data 
-        await get_ldavis(repo, field, force_refresh=True, github_token=github_token)
+        # This will generate the LDA visualization and also save topic data; the model is fit in
+        # its own container, so awaiting it leaves the event loop free
+        issues_data = _load_issues(repo, github_token)
+        volume.commit()
+        rows = await compute_ldavis.remote.aio(issues_data, field, repo)
+        _save_ldavis_rows(repo, rows)
         
         # Now try to get the saved topic data
-        cached_data = get_visualization_data(repo, visualization_type)
+        cached = get_visualization_payload(repo, visualization_type)
         
-        if not cached_data:
+        if not cached or not cached[0]:
             # If we still don't have data, return a fallback with empty topics
             logging.warning(f"Failed to generate topic data for repository: '{repo}'")
             return {"topics": [], "error": "Failed to generate topic data"}
         
+        cached_data, cached_json = cached
+        if isinstance(cached_data, dict):
+            return raw_json_response(cached_json)
+        
         try:
-            parsed_data = json.loads(cached_data)
+            parsed_data = _parse_topic_data(cached_data)
             logging.info(f"Generated data contains: {list(parsed_data.keys())}")
-            return CustomJSONResponse(content=parsed_data)
+            return ORJSONResponse(content=parsed_data)
         except json.JSONDecodeError as e:
             logging.error(f"Error parsing generated data: {e}")
             return {"topics": [], "error": f"Invalid topic data format: {str(e)}"}
@@ -1041,52 +1178,33 @@ async def get_topics_from_ldavis(repo: str, field: str = Query("body"), force_re
         # Return empty topics list in case of error
         return {"topics": [], "error": str(e)}
 
-@fastapi_app.post("/visualize/nomic-atlas-topics")
-async def get_nomic_atlas_topics(req: NomicApiKeyRequest):
-    """Generate topic data using Nomic Atlas"""
-    repo = req.repo
-    field = req.field
-    force_refresh = req.force_refresh
-    github_token = req.github_token
-    nomic_api_key = req.nomic_api_key
-    dataset_name = req.dataset_name
-    
+# Nomic Atlas data is cached for a week; a map still processing after an hour is regenerated
+NOMIC_CACHE_HOURS = 168  # 7 days * 24 hours
+NOMIC_PROCESSING_TIMEOUT_SECONDS = 3600
+
+def _is_stale_processing(repo: str, visualization_type: str) -> bool:
+    """Whether a cached Nomic Atlas entry has been in processing state for too long"""
+    last_updated = get_visualization_last_updated(repo, visualization_type)
+    return last_updated is not None and time.time() - last_updated > NOMIC_PROCESSING_TIMEOUT_SECONDS
+
+async def _nomic_atlas_topics_impl(repo: str, field: str, force_refresh: bool, github_token: Optional[str],
+                                   nomic_api_key: Optional[str], dataset_name: Optional[str]):
+    """Return cached Nomic Atlas topic data, generating it when missing or stuck in processing"""
     # Set visualization type for caching
     visualization_type = f"nomic_atlas_topics_{field}"
     
-    # Use a 1-week (168 hours) cache expiration for Nomic Atlas data
-    cache_expiration_hours = 168  # 7 days * 24 hours
-    
     # Check cache first if not forcing refresh
     if not force_refresh:
-        cached_data = get_visualization_data(repo, visualization_type, max_age_hours=cache_expiration_hours)
-        if cached_data:
+        cached = get_visualization_payload(repo, visualization_type, max_age_hours=NOMIC_CACHE_HOURS)
+        if cached and cached[0]:
+            cached_data, cached_json = cached
             # If the cached data is in "processing" state, we should refresh it if it's older than 1 hour
-            if isinstance(cached_data, dict) and cached_data.get("status") == "processing":
-                # Get the last updated time from the database
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT last_updated 
-                FROM visualization_cache 
-                WHERE repo_name = ? AND visualization_type = ?
-                ''', (repo, visualization_type))
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    last_updated_str = row[0]
-                    last_updated = datetime.fromisoformat(last_updated_str)
-                    # If processing state is older than 1 hour, refresh it
-                    if datetime.now() - last_updated > timedelta(hours=1):
-                        logging.info(f"Cached Nomic Atlas data for {repo} is in processing state for more than 1 hour, refreshing...")
-                        force_refresh = True
-                    else:
-                        return cached_data
-                else:
-                    return cached_data
+            if (isinstance(cached_data, dict) and cached_data.get("status") == "processing"
+                    and _is_stale_processing(repo, visualization_type)):
+                logging.info(f"Cached Nomic Atlas data for {repo} is in processing state for more than 1 hour, refreshing...")
+                force_refresh = True
             else:
-                return cached_data
+                return raw_json_response(cached_json)
     
     # Get issues data
     issues_response = await get_issues_data(repo, force_refresh, github_token)
@@ -1102,16 +1220,13 @@ async def get_nomic_atlas_topics(req: NomicApiKeyRequest):
     if not issues_data:
         raise HTTPException(status_code=404, detail=f"No issues data found for repository: {repo}")
 
-    # Convert to DataFrame
-    issues_df = pd.DataFrame(issues_data)
-
     # Generate a dataset name from repo if not provided
     if not dataset_name:
         # Convert repo name to valid dataset name (replace / with -)
         dataset_name = repo.replace('/', '-') + '-issues'
 
     # Generate Nomic Atlas topic data
-    topic_data = prepare_nomic_atlas_topics(issues_df, field, nomic_api_key, dataset_name)
+    topic_data = prepare_nomic_atlas_topics(issues_data, field, nomic_api_key, dataset_name)
 
     # Check if there was an error
     if "error" in topic_data:
@@ -1122,6 +1237,30 @@ async def get_nomic_atlas_topics(req: NomicApiKeyRequest):
 
     return topic_data
 
+@fastapi_app.post("/visualize/nomic-atlas-topics")
+async def get_nomic_atlas_topics(req: NomicApiKeyRequest):
+    """Generate topic data using Nomic Atlas"""
+    return await _nomic_atlas_topics_impl(
+        req.repo, req.field, req.force_refresh, req.github_token, req.nomic_api_key, req.dataset_name
+    )
+
+# Columns of similarity_search_issues rows, and the subset sent to the model
+_SEARCH_RESULT_COLUMNS = [
+    "issue_id", "similarity_distance", "repo_name", "issue_number", "title", "body", "state", "author", "created_at", "labels"
+]
+_CHAT_RESULT_FIELDS = ["issue_number", "title", "body", "state", "author", "created_at", "labels", "similarity_distance"]
+CHAT_BODY_PREVIEW_CHARS = 500
+
+def _format_search_results(search_results) -> List[Dict[str, Any]]:
+    """Shape similarity search rows for the chat model, truncating long bodies"""
+    results_df = pd.DataFrame(search_results, columns=_SEARCH_RESULT_COLUMNS)
+    body = results_df["body"]
+    # Truncate long bodies; missing bodies compare as not long and stay None
+    long_body = body.str.len() > CHAT_BODY_PREVIEW_CHARS
+    results_df["body"] = body.mask(long_body, body.str.slice(0, CHAT_BODY_PREVIEW_CHARS) + "...")
+    results_df["labels"] = results_df["labels"].map(split_labels)
+    return results_df[_CHAT_RESULT_FIELDS].to_dict(orient="records")
+
 @fastapi_app.post("/chat/ask")
 async def chat_with_issues(req: ChatRequest):
     """
@@ -1129,9 +1268,7 @@ async def chat_with_issues(req: ChatRequest):
     1) Do RAG (similarity search on GitHub issues)
     2) Generate & execute SQL queries on issues
     """
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = get_openai_client()
     repo = req.repo
     user_query = req.query
     github_token = req.github_token
@@ -1140,7 +1277,7 @@ async def chat_with_issues(req: ChatRequest):
         raise HTTPException(status_code=400, detail="No query provided.")
     
     # Ensure we have issues data with embeddings
-    volume.reload()
+    await _maybe_reload()
     issues_response = await get_issues_data(repo, False, github_token)
     if not issues_response:
         raise HTTPException(status_code=404, detail=f"No issues found for repository: {repo}")
@@ -1178,7 +1315,7 @@ async def chat_with_issues(req: ChatRequest):
         - author: GitHub username who created the issue
         - created_at: timestamp when issue was created
         - updated_at: timestamp when issue was last updated
-        - labels: JSON array of label names
+        - labels: label names joined by the unit separator char(31); filter with labels LIKE '%name%'
 
         Choose the best approach for the user's question. For content-based questions about what issues discuss, use RAG. For statistics and structured queries, use SQL.
         """
@@ -1218,19 +1355,7 @@ async def chat_with_issues(req: ChatRequest):
                 search_results = similarity_search_issues(repo, user_query)
                 
                 # Format results for the AI
-                formatted_results = []
-                for result in search_results:
-                    issue_id, distance, repo_name, issue_number, title, body, state, author, created_at, labels = result
-                    formatted_results.append({
-                        "issue_number": issue_number,
-                        "title": title,
-                        "body": body[:500] + "..." if body and len(body) > 500 else body,  # Truncate long bodies
-                        "state": state,
-                        "author": author,
-                        "created_at": created_at,
-                        "labels": json.loads(labels) if labels else [],
-                        "similarity_distance": distance
-                    })
+                formatted_results = _format_search_results(search_results)
                 
                 messages.append({
                     "tool_call_id": tool_call.id,
@@ -1286,7 +1411,7 @@ async def chat_with_issues(req: ChatRequest):
 @fastapi_app.get("/chat/test/{repo:path}")  
 async def test_embeddings(repo: str):
     """Test endpoint to verify embeddings are working"""
-    volume.reload()
+    await _maybe_reload()
     
     # Test similarity search with a simple query
     try:
@@ -1316,73 +1441,4 @@ async def get_nomic_atlas_topics_get(
     dataset_name: Optional[str] = None
 ):
     """Generate topic data using Nomic Atlas (GET endpoint)"""
-    # Set visualization type for caching
-    visualization_type = f"nomic_atlas_topics_{field}"
-    
-    # Use a 1-week (168 hours) cache expiration for Nomic Atlas data
-    cache_expiration_hours = 168  # 7 days * 24 hours
-    
-    # Check cache first if not forcing refresh
-    if not force_refresh:
-        cached_data = get_visualization_data(repo, visualization_type, max_age_hours=cache_expiration_hours)
-        if cached_data:
-            # If the cached data is in "processing" state, we should refresh it if it's older than 1 hour
-            if isinstance(cached_data, dict) and cached_data.get("status") == "processing":
-                # Get the last updated time from the database
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT last_updated 
-                FROM visualization_cache 
-                WHERE repo_name = ? AND visualization_type = ?
-                ''', (repo, visualization_type))
-                row = cursor.fetchone()
-                conn.close()
-                
-                if row:
-                    last_updated_str = row[0]
-                    last_updated = datetime.fromisoformat(last_updated_str)
-                    # If processing state is older than 1 hour, refresh it
-                    if datetime.now() - last_updated > timedelta(hours=1):
-                        logging.info(f"Cached Nomic Atlas data for {repo} is in processing state for more than 1 hour, refreshing...")
-                        force_refresh = True
-                    else:
-                        return cached_data
-                else:
-                    return cached_data
-            else:
-                return cached_data
-    
-    # Get issues data
-    issues_response = await get_issues_data(repo, force_refresh, github_token)
-    if not issues_response:
-        raise HTTPException(status_code=404, detail=f"No issues found for repository: {repo}")
-    
-    # Extract the actual issues data from the response
-    if isinstance(issues_response, dict) and 'data' in issues_response:
-        issues_data = issues_response['data']
-    else:
-        issues_data = issues_response
-    
-    if not issues_data:
-        raise HTTPException(status_code=404, detail=f"No issues data found for repository: {repo}")
-
-    # Convert to DataFrame
-    issues_df = pd.DataFrame(issues_data)
-
-    # Generate a dataset name from repo if not provided
-    if not dataset_name:
-        # Convert repo name to valid dataset name (replace / with -)
-        dataset_name = repo.replace('/', '-') + '-issues'
-
-    # Generate Nomic Atlas topic data
-    topic_data = prepare_nomic_atlas_topics(issues_df, field, nomic_api_key, dataset_name)
-
-    # Check if there was an error
-    if "error" in topic_data:
-        raise HTTPException(status_code=500, detail=topic_data["error"])
-
-    # Save to cache
-    save_visualization_data(repo, visualization_type, topic_data)
-
-    return topic_data
+    return await _nomic_atlas_topics_impl(repo, field, force_refresh, github_token, nomic_api_key, dataset_name)
@@ -1,10 +1,14 @@
 import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any, Optional
-from wordcloud import WordCloud, STOPWORDS
+from typing import Dict, List, Tuple, Any, Optional, Union
+from wordcloud import STOPWORDS
+from wordcloud.tokenization import process_tokens
 import re
+from collections import Counter, OrderedDict
 import json
+import hashlib
+import orjson
 import os
 import time
 
@@ -16,38 +20,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def prepare_wordcloud_data(data_frame: pd.DataFrame, field: str = "body") -> Dict[str, Any]:
-    """Generate word cloud data from text field in dataframe"""
-    logger.info(f"Generating word cloud data using {field}")
+# URLs and runs of non-alphabetic characters are blanked in one pass, then whitespace is collapsed
+_CLEAN_RE = re.compile(r'https?://\S+|[^a-zA-Z\s]+')
+_WS_RE = re.compile(r'\s+')
 
-    if data_frame.empty or field not in data_frame.columns:
-        logger.error(f"Invalid DataFrame input for word cloud: missing '{field}' column")
-        return {}
+# Frozen once so the per-word membership tests hit an immutable, lower-cased set
+_STOPWORDS = frozenset(map(str.lower, STOPWORDS))
+
+# Word pattern used by WordCloud.process_text
+_WORD_RE = re.compile(r"\w[\w']*")
+
+def _iter_words(texts: List[str]):
+    """Yield the words of each text in turn, filtered as WordCloud.process_text does"""
+    for text in texts:
+        for word in _WORD_RE.findall(text):
+            if word.lower().endswith("'s"):
+                word = word[:-2]
+            if not word.isdigit() and word.lower() not in _STOPWORDS:
+                yield word
+
+# Nomic topic data may carry numpy values and non-string keys
+_TOPIC_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Word cloud and basic topic results for recently seen corpora, keyed by content hash and parameters
+TEXT_RESULT_CACHE_SIZE = 32
+_text_result_cache = OrderedDict()  # (kind, corpus hash, *params) -> result
+
+def _texts_fingerprint(texts: List[str]) -> str:
+    """Short content hash of a list of texts"""
+    digest = hashlib.blake2b(digest_size=12)
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _get_text_result(key: Tuple) -> Optional[Dict[str, Any]]:
+    """Get a cached text result, marking it recently used"""
+    result = _text_result_cache.get(key)
+    if result is not None:
+        _text_result_cache.move_to_end(key)
+    return result
+
+def _put_text_result(key: Tuple, result: Dict[str, Any]) -> None:
+    """Cache a text result, evicting the least recently used beyond TEXT_RESULT_CACHE_SIZE"""
+    _text_result_cache[key] = result
+    _text_result_cache.move_to_end(key)
+    while len(_text_result_cache) > TEXT_RESULT_CACHE_SIZE:
+        _text_result_cache.popitem(last=False)
+
+def extract_field(issues: Union[pd.DataFrame, List[Dict[str, Any]]], field: str) -> List[str]:
+    """Get the non-empty text values of one field from issue dicts or a dataframe"""
+    if isinstance(issues, pd.DataFrame):
+        if field not in issues.columns:
+            logger.error(f"Invalid DataFrame input: missing '{field}' column")
+            return []
+        values = issues[field].tolist()
+    else:
+        # Only one field is needed, so skip building a dataframe from the issue dicts
+        values = [issue.get(field) for issue in issues]
+    return [text for text in values if text and isinstance(text, str)]
+
+def prepare_wordcloud_data(issues: Union[pd.DataFrame, List[Dict[str, Any]]], field: str = "body") -> Dict[str, Any]:
+    """Generate word cloud data from text field in issues"""
+    logger.info(f"Generating word cloud data using {field}")
 
     # Get text data
-    _text = list(data_frame[field].dropna().values)
+    _text = extract_field(issues, field)
     
     if not _text:
         logger.warning(f"No valid {field} text for word cloud generation")
         return {}
     
+    cache_key = ("wordcloud", _texts_fingerprint(_text))
+    cached = _get_text_result(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        text = " ".join(_text)
-        word_cloud = WordCloud(
-            stopwords=STOPWORDS,
-            max_words=100,
-            max_font_size=90,
-            collocations=False
-        )
-        word_cloud.generate(text)
-
-        # Extract word frequencies
-        word_freq = {}
-        for (word, freq), _, _, _, _ in word_cloud.layout_:
-            word_freq[word] = freq
+        # Count words document by document instead of joining the corpus into one string;
+        # process_tokens then folds case variants and plurals like WordCloud.process_text
+        word_counts, _ = process_tokens(_iter_words(_text))
+        top_words = Counter(word_counts).most_common(100)
         
-        # Sort by frequency
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
+        # Scale relative to the most frequent word, as the rendered layout did
+        max_count = top_words[0][1] if top_words else 1
+        sorted_words = [(word, count / max_count) for word, count in top_words]
         
         # Create visualization data
         visualization_data = {
@@ -59,37 +116,39 @@ def prepare_wordcloud_data(data_frame: pd.DataFrame, field: str = "body") -> Dic
             }
         }
         
+        _put_text_result(cache_key, visualization_data)
         return visualization_data
     
     except Exception as e:
         logger.error(f"Error generating word cloud data: {e}")
         return {}
 
-def prepare_topic_modeling_data(data_frame: pd.DataFrame, field: str = "body", num_topics: int = 5) -> Dict[str, Any]:
+def prepare_topic_modeling_data(issues: Union[pd.DataFrame, List[Dict[str, Any]]], field: str = "body", num_topics: int = 5) -> Dict[str, Any]:
     """Prepare data for topic modeling visualization"""
     # This is a placeholder for topic modeling data preparation
     # In a real implementation, this would generate LDA model data
     
-    if data_frame.empty or field not in data_frame.columns:
-        logger.error(f"Invalid DataFrame input for topic modeling: missing '{field}' column")
-        return {}
-    
     # Get text data
-    data = [text for text in data_frame[field].dropna().values if text]
+    data = extract_field(issues, field)
     
     if not data:
         logger.warning(f"No valid {field} text for topic modeling")
         return {}
     
+    cache_key = ("topics", _texts_fingerprint(data), num_topics)
+    cached = _get_text_result(cache_key)
+    if cached is not None:
+        return cached
+    
     # Clean the text: remove URLs, non-alphabetic characters, extra whitespace, and convert to lower case
-    cleaned_data = []
-    for text in data:
-        cleaned_text = re.sub(r'https?://\S+', '', text)  # remove URLs
-        cleaned_text = re.sub(r'[^a-zA-Z\s]', ' ', cleaned_text)  # remove non-alphabetic characters
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text)  # collapse multiple spaces
-        cleaned_text = cleaned_text.lower().strip()
-        if cleaned_text:
-            cleaned_data.append(cleaned_text)
+    cleaned = (
+        pd.Series(data, dtype=object)
+        .str.replace(_CLEAN_RE, ' ', regex=True)  # remove URLs and non-alphabetic characters
+        .str.replace(_WS_RE, ' ', regex=True)  # collapse multiple spaces
+        .str.lower()
+        .str.strip()
+    )
+    cleaned_data = cleaned[cleaned.str.len() > 0].tolist()
     
     if not cleaned_data:
         logger.warning("No clean text data available for topic modeling")
@@ -100,14 +159,9 @@ def prepare_topic_modeling_data(data_frame: pd.DataFrame, field: str = "body", n
     
     # Create mock topic data based on word frequencies
     all_text = " ".join(cleaned_data)
-    words = all_text.split()
-    word_count = {}
-    
-    for word in words:
-        if len(word) > 3 and word not in STOPWORDS:
-            word_count[word] = word_count.get(word, 0) + 1
+    word_count = Counter(word for word in all_text.split() if len(word) > 3 and word not in _STOPWORDS)
     
-    top_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)[:100]
+    top_words = word_count.most_common(100)
     
     # Create mock topics
     topics = []
@@ -125,100 +179,91 @@ def prepare_topic_modeling_data(data_frame: pd.DataFrame, field: str = "body", n
         }
         topics.append(topic)
     
-    return {"topics": topics}
+    result = {"topics": topics}
+    _put_text_result(cache_key, result)
+    return result
 
-def prepare_repository_insights(issues_df: pd.DataFrame) -> Dict[str, Any]:
-    """Generate repository insights from issues dataframe"""
+def prepare_repository_insights(issues: Union[pd.DataFrame, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Generate repository insights from issue dicts or an issues dataframe"""
+    issues_df = issues if isinstance(issues, pd.DataFrame) else pd.DataFrame(issues)
     if issues_df.empty:
         return {}
     
+    # Optional columns are checked once up front
+    columns = set(issues_df.columns)
+    has_state = 'state' in columns
+    has_closed_at = 'closed_at' in columns
+    has_time_to_close = 'time_to_close' in columns
+    
     try:
-        # Convert datetime strings to datetime objects if needed
-        if isinstance(issues_df['created_at'][0], str):
-            issues_df['created_at'] = pd.to_datetime(issues_df['created_at'])
-        if 'closed_at' in issues_df.columns:
-            closed_issues = issues_df[issues_df['closed_at'].notna()]
-            if not closed_issues.empty and isinstance(closed_issues['closed_at'].iloc[0], str):
-                issues_df.loc[issues_df['closed_at'].notna(), 'closed_at'] = pd.to_datetime(
-                    issues_df.loc[issues_df['closed_at'].notna(), 'closed_at']
-                )
+        # Convert datetime strings to datetime objects; already-converted columns pass through
+        issues_df['created_at'] = pd.to_datetime(issues_df['created_at'], errors='coerce')
+        if has_closed_at:
+            issues_df['closed_at'] = pd.to_datetime(issues_df['closed_at'], errors='coerce')
+        
+        # Low-cardinality string columns are counted on their integer category codes
+        for col in ('state', 'user'):
+            if col in columns:
+                issues_df[col] = issues_df[col].astype('category')
         
         # Add date column for daily grouping
         issues_df['date'] = issues_df['created_at'].dt.date
         
         # State distribution
-        state_counts = issues_df['state'].value_counts().to_dict()
-        # Convert NumPy int64 to Python int
-        state_counts = {k: int(v) for k, v in state_counts.items()}
+        state_counts = issues_df['state'].value_counts().astype(int).to_dict() if has_state else {}
         
         # Time to close statistics
         time_to_close_stats = {}
-        if 'time_to_close' in issues_df.columns:
-            closed_issues = issues_df[issues_df['time_to_close'].notna()]
-            if not closed_issues.empty:
-                time_to_close_stats = {
-                    'mean': float(closed_issues['time_to_close'].mean()),  # Already in days, convert to Python float
-                    'median': float(closed_issues['time_to_close'].median()),
-                    'min': float(closed_issues['time_to_close'].min()),
-                    'max': float(closed_issues['time_to_close'].max())
-                }
+        if has_time_to_close:
+            time_to_close = issues_df['time_to_close'].dropna()  # Already in days
+            if not time_to_close.empty:
+                time_to_close_stats = time_to_close.agg(['mean', 'median', 'min', 'max']).astype(float).to_dict()
         
         # Top contributors
-        top_contributors = issues_df['user'].value_counts().head(10).to_dict()
-        # Convert NumPy int64 to Python int
-        top_contributors = {k: int(v) for k, v in top_contributors.items()}
+        # Only the top ten are kept, so select them instead of sorting every user
+        top_contributors = issues_df['user'].value_counts(sort=False).nlargest(10).astype(int).to_dict()
         
         # Comments statistics
+        comments = issues_df['comments'].agg(['sum', 'mean', 'median', 'max'])
         comments_stats = {
-            'total': int(issues_df['comments'].sum()),
-            'mean': float(issues_df['comments'].mean()),
-            'median': float(issues_df['comments'].median()),
-            'max': int(issues_df['comments'].max())
+            'total': int(comments['sum']),
+            'mean': float(comments['mean']),
+            'median': float(comments['median']),
+            'max': int(comments['max'])
         }
         
         # Issues over time
-        issues_over_time = issues_df.groupby('date').size().reset_index()
-        issues_over_time.columns = ['date', 'count']
-        issues_over_time['cumulative'] = issues_over_time['count'].cumsum()
-        
-        # Convert date objects to strings for JSON serialization
-        issues_over_time['date'] = issues_over_time['date'].astype(str)
-        
-        # Convert NumPy types to Python native types for JSON serialization
-        def convert_to_python_types(df):
-            for col in df.select_dtypes(include=['int64', 'float64']).columns:
-                df[col] = df[col].astype('object')
-                df[col] = df[col].apply(lambda x: int(x) if isinstance(x, pd.Int64Dtype) else float(x))
-            return df
-            
-        issues_over_time = convert_to_python_types(issues_over_time)
+        daily_counts = issues_df['date'].value_counts(sort=False).sort_index()
+        counts = daily_counts.to_numpy(dtype=np.int64)
+        issues_over_time = pd.DataFrame({
+            'date': daily_counts.index.astype(str),  # Convert date objects to strings for JSON serialization
+            'count': counts,
+            'cumulative': np.cumsum(counts),
+        })
         
         # Open vs Closed issues over time
-        if 'state' in issues_df.columns:
-            state_over_time = issues_df.groupby(['date', 'state']).size().unstack(fill_value=0)
-            state_over_time = state_over_time.reset_index()
+        if has_state:
+            state_over_time = pd.crosstab(issues_df['date'], issues_df['state']).reset_index()
             state_over_time['date'] = state_over_time['date'].astype(str)
-            state_over_time = convert_to_python_types(state_over_time)
             state_time_data = state_over_time.to_dict(orient='records')
         else:
             state_time_data = []
         
         # Day of week activity
-        if isinstance(issues_df['created_at'][0], pd.Timestamp):
-            issues_df['day_of_week'] = issues_df['created_at'].dt.day_name()
-            issues_df['hour'] = issues_df['created_at'].dt.hour
+        if pd.api.types.is_datetime64_any_dtype(issues_df['created_at']):
+            created_at = issues_df['created_at'].dropna()
             
-            day_hour_counts = issues_df.groupby(['day_of_week', 'hour']).size().reset_index()
-            day_hour_counts.columns = ['day', 'hour', 'count']
+            # Count into a 7x24 day/hour grid; rows run Monday-first
+            slots = created_at.dt.dayofweek.to_numpy(dtype=np.int64) * 24 + created_at.dt.hour.to_numpy(dtype=np.int64)
+            day_hour_counts = np.bincount(slots, minlength=7 * 24).reshape(7, 24)
             
-            # Ensure all days are in proper order
             days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_hour_counts['day_idx'] = day_hour_counts['day'].apply(lambda x: days_order.index(x))
-            day_hour_counts = day_hour_counts.sort_values(['day_idx', 'hour'])
-            day_hour_counts = day_hour_counts.drop('day_idx', axis=1)
-            
-            day_hour_counts = convert_to_python_types(day_hour_counts)
-            activity_heatmap = day_hour_counts.to_dict(orient='records')
+            activity_heatmap = [
+                {'day': days_order[day], 'hour': hour, 'count': int(day_hour_counts[day, hour])}
+                for day in range(7)
+                for hour in range(24)
+                if day_hour_counts[day, hour]
+            ]
         else:
             activity_heatmap = []
         
@@ -236,7 +281,7 @@ def prepare_repository_insights(issues_df: pd.DataFrame) -> Dict[str, Any]:
         logger.error(f"Error generating repository insights: {e}")
         return {}
 
-def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", api_key: Optional[str] = None, dataset_name: Optional[str] = None) -> Dict[str, Any]:
+def prepare_nomic_atlas_topics(issues: Union[pd.DataFrame, List[Dict[str, Any]]], field: str = "body", api_key: Optional[str] = None, dataset_name: Optional[str] = None) -> Dict[str, Any]:
     """Generate topic data using Nomic Atlas"""
     logger.info(f"Generating Nomic Atlas topic data using {field}")
     
@@ -261,45 +306,50 @@ def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", ap
                 logger.error("No Nomic API key provided and NOMIC_API_KEY environment variable not set")
                 return {"error": "Nomic API key is required"}
         
-        # Check if the dataframe is valid and contains the requested field
-        if data_frame.empty:
-            logger.error("Empty DataFrame provided for Nomic Atlas")
+        # Documents are built straight from the issue dicts; a dataframe is only unpacked into them
+        if isinstance(issues, pd.DataFrame):
+            # Missing cells become None in one vectorized pass, matching the issue dicts
+            records = issues.astype(object).where(issues.notna(), None).to_dict(orient="records")
+            record_ids = issues.index.tolist()
+            columns = list(issues.columns)
+        else:
+            records = issues
+            record_ids = range(len(records))
+            columns = list(records[0].keys()) if records else []
+        
+        # Check if the data is valid and contains the requested field
+        if not records:
+            logger.error("Empty data provided for Nomic Atlas")
             return {"error": "Empty data provided for topic generation"}
         
-        # If the requested field is not in the dataframe, try to use 'body' or 'title' as fallback
-        if field not in data_frame.columns:
+        # If the requested field is not in the data, try to use 'body' or 'title' as fallback
+        if field not in columns:
             logger.warning(f"Requested field '{field}' not found in data. Looking for alternatives.")
-            if 'body' in data_frame.columns:
+            if 'body' in columns:
                 logger.info("Using 'body' field instead")
                 field = 'body'
-            elif 'title' in data_frame.columns:
+            elif 'title' in columns:
                 logger.info("Using 'title' field instead")
                 field = 'title'
             else:
                 logger.error("No suitable text field found in data")
-                return {"error": f"No suitable text field found. Available columns: {', '.join(data_frame.columns)}"}
+                return {"error": f"No suitable text field found. Available columns: {', '.join(columns)}"}
+        
+        # Add other fields that might be useful; labels are lists and are left out
+        other_columns = [col for col in columns if col != field and col != 'labels']
         
         # Prepare documents for Nomic Atlas
-        documents = []
-        for i, row in data_frame.iterrows():
-            if pd.notna(row.get(field)):
-                # Create a clean document with only the necessary fields
-                doc = {
-                    'id': str(i),  # Ensure id is a string for Nomic 3.4.1
-                    field: str(row.get(field, "")) if pd.notna(row.get(field)) else ""
-                }
-                
-                # Add other fields that might be useful
-                for col in data_frame.columns:
-                    if col != field and col != 'labels' and pd.notna(row.get(col)):
-                        try:
-                            # Convert to string to ensure compatibility
-                            doc[col] = str(row.get(col, ""))
-                        except:
-                            # Skip fields that can't be converted to string
-                            pass
-                
-                documents.append(doc)
+        # Only the necessary fields are kept, all as strings for compatibility;
+        # the id must be a string for Nomic 3.4.1
+        documents = [
+            {
+                'id': str(record_id),
+                field: str(record[field]),
+                **{col: str(record[col]) for col in other_columns if record.get(col) is not None},
+            }
+            for record_id, record in zip(record_ids, records)
+            if record.get(field) is not None
+        ]
         
         if not documents:
             logger.warning(f"No valid {field} text for Nomic Atlas topic generation")
@@ -349,7 +399,8 @@ def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", ap
             # Wait for topics to be generated
             # This can take some time for larger datasets
             max_wait_time = 300  # Maximum wait time in seconds (5 minutes)
-            wait_interval = 5    # Check every 5 seconds
+            wait_interval = 1    # First re-check after 1 second, doubling each time
+            max_wait_interval = 30  # Never wait more than 30 seconds between checks
             start_time = time.time()
             
             logger.info("Waiting for Nomic Atlas topics to be generated...")
@@ -415,7 +466,7 @@ def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", ap
                             # Ensure all data is JSON serializable
                             try:
                                 # Test JSON serialization
-                                json.dumps(topic_data)
+                                orjson.dumps(topic_data, option=_TOPIC_JSON_OPTIONS)
                             except TypeError as e:
                                 logger.error(f"Topic data contains non-serializable values: {e}")
                                 # Create a clean version with only serializable data
@@ -440,8 +491,9 @@ def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", ap
                     else:
                         logger.warning(f"Error checking topics: {e}")
                 
-                # Wait before checking again
+                # Wait before checking again, backing off so small datasets return quickly
                 time.sleep(wait_interval)
+                wait_interval = min(wait_interval * 2, max_wait_interval)
             
             # Check if we timed out
             if topic_data["status"] == "processing":
@@ -451,7 +503,7 @@ def prepare_nomic_atlas_topics(data_frame: pd.DataFrame, field: str = "body", ap
             
             # Final safety check to ensure data is serializable
             try:
-                return json.loads(json.dumps(topic_data))  # This ensures we have a fully serializable object
+                return orjson.loads(orjson.dumps(topic_data, option=_TOPIC_JSON_OPTIONS))  # This ensures we have a fully serializable object
             except Exception as e:
                 logger.error(f"Final serialization check failed: {e}")
                 return {
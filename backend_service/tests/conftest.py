@@ -0,0 +1,38 @@
+import pytest
+
+from agileai import common, database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the database module at a fresh, initialized database with single-connection pools"""
+    db_path = tmp_path / "test.db"
+    write_pool = common.ConnectionPool(db_path, size=1)
+    read_pool = common.ConnectionPool(db_path, size=1, readonly=True)
+    monkeypatch.setattr(database, "write_pool", write_pool)
+    monkeypatch.setattr(database, "read_pool", read_pool)
+    database.init_db()
+    yield db_path
+    write_pool.close_all()
+    read_pool.close_all()
+
+
+def make_issue(number: int, **fields):
+    """Issue dict shaped like github_api.get_issues output"""
+    issue = {
+        "id": 1000 + number,
+        "number": number,
+        "title": f"Issue {number}",
+        "body": f"Body of issue {number}",
+        "state": "open",
+        "user": "octocat",
+        "comments": 0,
+        "labels": [],
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+        "closed_at": None,
+        "time_to_close": None,
+        "html_url": f"https://github.com/owner/repo/issues/{number}",
+    }
+    issue.update(fields)
+    return issue
@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pytest
+
+from agileai import common
+
+
+def test_connection_borrowed_across_close_all_is_not_reused(tmp_path):
+    pool = common.ConnectionPool(tmp_path / "test.db", size=1)
+
+    with pool.connection() as borrowed:
+        # A volume reload happens while the connection is out
+        pool.close_all()
+
+    with pool.connection() as conn:
+        assert conn is not borrowed
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed.execute("SELECT 1")
+    pool.close_all()
+
+
+def test_idle_connection_is_reused(tmp_path):
+    pool = common.ConnectionPool(tmp_path / "test.db", size=1)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    pool.close_all()
+
+
+def test_size_one_pool_serializes_borrowers(tmp_path):
+    pool = common.ConnectionPool(tmp_path / "test.db", size=1)
+    first_holding = threading.Event()
+    release_first = threading.Event()
+    borrowed = []
+
+    def first():
+        with pool.connection() as conn:
+            borrowed.append(("first", conn))
+            first_holding.set()
+            release_first.wait(timeout=5)
+
+    def second():
+        first_holding.wait(timeout=5)
+        with pool.connection() as conn:
+            borrowed.append(("second", conn))
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+
+    # The second borrower waits while the only connection is out
+    first_holding.wait(timeout=5)
+    threads[1].join(timeout=0.2)
+    assert threads[1].is_alive()
+    assert [name for name, _ in borrowed] == ["first"]
+
+    release_first.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert [name for name, _ in borrowed] == ["first", "second"]
+    # Only one connection was ever opened, and it was handed over
+    assert borrowed[0][1] is borrowed[1][1]
+    pool.close_all()
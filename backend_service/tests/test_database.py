@@ -0,0 +1,76 @@
+import sqlite3
+from types import SimpleNamespace
+
+from agileai import database
+
+from conftest import make_issue
+
+
+def test_scoped_sql_query_does_not_leak_into_pooled_reader(db):
+    database.save_repository_issues("owner/a", [make_issue(1)])
+    database.save_repository_issues("owner/b", [make_issue(2)])
+
+    result = database.execute_sql_query_on_issues("owner/a", "SELECT issue_number FROM issues")
+    assert result["rows"] == [(1,)]
+
+    # The single pooled reader served the scoped query; other repositories must stay visible
+    issues = database.get_repository_issues("owner/b")
+    assert [issue["number"] for issue in issues] == [2]
+
+
+def test_init_db_drops_legacy_per_fingerprint_ldavis_pages(db):
+    legacy_type = "ldavis_body_0123456789abcdef01234567"
+    for visualization_type in (legacy_type, "ldavis_body", "ldavis_body_status", "ldavis_body_fingerprint"):
+        database.save_visualization_data("owner/a", visualization_type, {"status": "done"})
+
+    database.init_db()
+
+    assert database.get_visualization_data("owner/a", legacy_type) is None
+    for visualization_type in ("ldavis_body", "ldavis_body_status", "ldavis_body_fingerprint"):
+        assert database.get_visualization_data("owner/a", visualization_type) == {"status": "done"}
+
+
+class _FakeEmbeddings:
+    """Embeds each text as a unit vector on the axis of the first keyword it mentions"""
+
+    KEYWORDS = ("alpha", "beta", "gamma")
+
+    def create(self, model, input, dimensions):
+        texts = [input] if isinstance(input, str) else input
+        data = []
+        for text in texts:
+            vector = [0.0] * dimensions
+            axis = next((i for i, word in enumerate(self.KEYWORDS) if word in text), len(self.KEYWORDS))
+            vector[axis] = 1.0
+            data.append(SimpleNamespace(embedding=vector))
+        return SimpleNamespace(data=data)
+
+
+def test_similarity_search_is_limited_to_the_repository(db, monkeypatch):
+    monkeypatch.setattr(database, "get_openai_client", lambda: SimpleNamespace(embeddings=_FakeEmbeddings()))
+    database.save_issues_with_embeddings("owner/a", [
+        make_issue(1, title="alpha crash"),
+        make_issue(2, title="beta slowdown"),
+    ])
+    # Exact matches in another repository must not crowd out this repository's results
+    database.save_issues_with_embeddings("owner/b", [
+        make_issue(3, title="alpha crash"),
+        make_issue(4, title="alpha again"),
+    ])
+
+    results = database.similarity_search_issues("owner/a", "alpha", top_k=2)
+
+    assert [(row[2], row[3]) for row in results] == [("owner/a", 1), ("owner/a", 2)]
+
+
+def test_init_db_drops_etag_entries_keyed_by_url_alone(db):
+    with sqlite3.connect(db) as conn:
+        conn.execute("DROP TABLE etag_cache")
+        conn.execute("CREATE TABLE etag_cache (url TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, link TEXT)")
+        conn.execute("INSERT INTO etag_cache VALUES ('https://api.github.com/x', '\"v1\"', x'00', '')")
+
+    database.init_db()
+
+    assert database.get_etag_entry("https://api.github.com/x", "anon") is None
+    database.save_etag_entry("https://api.github.com/x", "anon", '"v2"', b"body", "")
+    assert database.get_etag_entry("https://api.github.com/x", "anon") == ('"v2"', b"body", "")
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+import requests
+
+from agileai import database, github_api
+
+from conftest import make_issue
+
+
+def test_failed_issue_fetch_raises_and_keeps_stored_issues(db, monkeypatch):
+    database.save_repository_issues("owner/repo", [make_issue(1), make_issue(2)])
+
+    def rate_limited(url, headers):
+        raise requests.exceptions.HTTPError("403 Client Error: rate limit exceeded")
+
+    monkeypatch.setattr(github_api, "_conditional_get", rate_limited)
+
+    # A failed fetch must not look like an empty repository, which would prune every stored issue
+    with pytest.raises(requests.exceptions.HTTPError):
+        github_api.get_issues("owner/repo")
+
+    issues = database.get_repository_issues("owner/repo")
+    assert sorted(issue["number"] for issue in issues) == [1, 2]
+
+
+class _FakeSession:
+    """Answers every GET with the same ETag, or 304 when the request already carries it"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers):
+        self.requests.append(dict(headers))
+        response = requests.Response()
+        response.url = url
+        response.headers["ETag"] = '"v1"'
+        if headers.get("If-None-Match") == '"v1"':
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            response._content = headers.get("Authorization", "anonymous").encode()
+        return response
+
+
+def test_stored_response_is_only_reused_for_the_same_token(db, monkeypatch):
+    session = _FakeSession()
+    monkeypatch.setattr(github_api, "_session", session)
+    url = "https://api.github.com/repos/owner/private"
+
+    _, body, _ = github_api._conditional_get(url, {"Authorization": "token first"})
+    assert body == b"token first"
+
+    # Another token, or none, must not be handed the body fetched with the first one
+    _, body, _ = github_api._conditional_get(url, {"Authorization": "token second"})
+    assert body == b"token second"
+    _, body, _ = github_api._conditional_get(url, {})
+    assert body == b"anonymous"
+    assert all("If-None-Match" not in headers for headers in session.requests)
+
+    _, body, _ = github_api._conditional_get(url, {"Authorization": "token first"})
+    assert session.requests[-1]["If-None-Match"] == '"v1"'
+    assert body == b"token first"
+
+
+def test_saving_a_response_prunes_expired_entries(db):
+    database.save_etag_entry("https://api.github.com/old", "anon", '"old"', b"old", "")
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE etag_cache SET last_updated = last_updated - ? * 3600", (database.ETAG_CACHE_MAX_AGE_HOURS + 1,))
+
+    assert database.get_etag_entry("https://api.github.com/old", "anon") is None
+
+    database.save_etag_entry("https://api.github.com/new", "anon", '"new"', b"new", "")
+
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT url FROM etag_cache").fetchall() == [("https://api.github.com/new",)]
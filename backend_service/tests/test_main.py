@@ -0,0 +1,86 @@
+import asyncio
+import importlib
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import orjson
+
+from conftest import make_issue
+
+# agileai.main is shadowed by the package's main() entry point, so import the module by name
+main = importlib.import_module("agileai.main")
+
+
+def test_visualization_payload_cache_stays_within_byte_budget(monkeypatch):
+    payloads = {f"viz_{i}": orjson.dumps({"words": ["x" * 100] * 10}) for i in range(5)}
+    monkeypatch.setattr(main, "get_visualization_version", lambda repo, viz, max_age_hours=24: (1, len(payloads[viz])))
+    monkeypatch.setattr(main, "get_visualization_data_json", lambda repo, viz, max_age_hours=24: payloads[viz])
+    monkeypatch.setattr(main, "_parsed_cache", main.OrderedDict())
+    monkeypatch.setattr(main, "_parsed_cache_bytes", 0)
+    budget = 2 * len(payloads["viz_0"])
+    monkeypatch.setattr(main, "PARSED_CACHE_MAX_BYTES", budget)
+
+    for viz in payloads:
+        data, data_json = main.get_visualization_payload("owner/repo", viz)
+        assert data_json == payloads[viz]
+
+    # Only the two most recent payloads fit the budget
+    assert list(main._parsed_cache) == [("owner/repo", "viz_3"), ("owner/repo", "viz_4")]
+    assert main._parsed_cache_bytes == budget
+
+
+def test_unchanged_corpus_reuses_ldavis_page_after_regular_cache_expiry(db, monkeypatch):
+    monkeypatch.setattr(main, "_lda_stopwords", lambda: frozenset())
+    monkeypatch.setattr(main, "_corpus_fingerprint", lambda processed_texts: "samecorpus")
+    main.save_visualization_data("owner/repo", "ldavis_body", "<html>old page</html>")
+    main.save_visualization_data("owner/repo", "topics_from_ldavis_body", {"topics": [{"id": 0}]})
+    main.save_visualization_data("owner/repo", "ldavis_body_fingerprint", {"fingerprint": "samecorpus"})
+
+    # Two days old: past the regular 24h cache, inside the fingerprint window
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE visualization_cache SET last_updated = last_updated - 2 * 86400")
+
+    issues = [make_issue(n, body=f"parser crash report number {n}") for n in range(1, 7)]
+    rows = {}
+    assert main.generate_ldavis_html(issues, "body", "owner/repo", rows) == "<html>old page</html>"
+
+    # The reused topic data is handed back for the caller to store, not written here
+    assert rows == {"topics_from_ldavis_body": {"topics": [{"id": 0}]}}
+    assert main.get_visualization_data("owner/repo", "topics_from_ldavis_body") is None
+
+    main.save_visualization_data("owner/repo", "topics_from_ldavis_body", rows["topics_from_ldavis_body"])
+    assert main.get_visualization_data("owner/repo", "topics_from_ldavis_body") == {"topics": [{"id": 0}]}
+
+
+class _FinishedCall:
+    def __init__(self, rows):
+        self.get = SimpleNamespace(aio=self._get)
+        self._rows = rows
+
+    async def _get(self, timeout=None):
+        return self._rows
+
+
+def test_ldavis_poll_stores_the_finished_job_rows(db, monkeypatch):
+    commits = []
+    monkeypatch.setattr(main, "volume", SimpleNamespace(commit=lambda: commits.append(True)))
+    monkeypatch.setattr(main, "_last_reload", time.monotonic())
+    rows = {
+        "ldavis_body": "<html>new page</html>",
+        "topics_from_ldavis_body": {"topics": [{"id": 0}]},
+        "ldavis_body_status": {"status": "done", "finished_at": time.time()},
+    }
+    monkeypatch.setattr(main.FunctionCall, "from_id", lambda call_id: _FinishedCall(rows))
+    main.save_visualization_data("owner/repo", "ldavis_body_status", {
+        "status": "running", "started_at": time.time(), "call_id": "fc-1"
+    })
+
+    response = asyncio.run(main.get_ldavis("owner/repo", "body"))
+
+    # The worker only returned its results; the polling web container stored and committed them
+    assert response.status_code == 200
+    assert response.body == b"<html>new page</html>"
+    assert main.get_visualization_data("owner/repo", "topics_from_ldavis_body") == {"topics": [{"id": 0}]}
+    assert main.get_visualization_data("owner/repo", "ldavis_body_status")["status"] == "done"
+    assert commits
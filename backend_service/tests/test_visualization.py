@@ -0,0 +1,26 @@
+from collections import Counter
+
+from wordcloud import WordCloud, STOPWORDS
+
+from agileai import visualization
+
+
+def test_wordcloud_frequencies_match_wordcloud_process_text():
+    issues = [
+        {"body": "Issue with the Parser: parsers crash on issues"},
+        {"body": "The parser's issue tracker lists 3 issues and 42 Issues"},
+        {"body": "Crash report: crash, crashes, CRASH"},
+        {"body": None},
+    ]
+
+    result = visualization.prepare_wordcloud_data(issues, "body")
+
+    texts = [issue["body"] for issue in issues if issue["body"]]
+    expected_counts = WordCloud(stopwords=STOPWORDS, collocations=False).process_text(" ".join(texts))
+    expected = Counter(expected_counts).most_common(100)
+    max_count = expected[0][1]
+    assert result["wordcloud"]["words"] == [{"text": word, "value": count / max_count} for word, count in expected]
+
+    words = {entry["text"] for entry in result["wordcloud"]["words"]}
+    # Plurals fold into their singular and case variants into the most common spelling
+    assert "issue" in words and "issues" not in words and "Issues" not in words
@@ -2,6 +2,20 @@ import { useState, useEffect } from 'react';
 import { Loader2, RefreshCw } from 'lucide-react';
 import { LDAVisViewer } from './LDAVisViewer';
 
+type SparseTopicTermDist = { term_ids: number[]; probs: number[] };
+
+// The API sends only each topic's most probable terms; expand them to one probability per term
+function densifyTopicTermDists(dists: Array<number[] | SparseTopicTermDist>, numTerms: number): number[][] {
+  return dists.map((dist) => {
+    if (Array.isArray(dist)) return dist;
+    const dense = new Array<number>(numTerms).fill(0);
+    dist.term_ids.forEach((termId, i) => {
+      dense[termId] = dist.probs[i];
+    });
+    return dense;
+  });
+}
+
 interface PyLDAVisViewerProps {
   repoName: string;
   field: string;
@@ -35,7 +49,7 @@ export function PyLDAVisViewer({ repoName, field, apiUrl }: PyLDAVisViewerProps)
               topics: data.topics || [],
               terms: data.terms || [],
               term_frequency: data.term_frequency || [],
-              topic_term_dists: data.topic_term_dists || []
+              topic_term_dists: densifyTopicTermDists(data.topic_term_dists || [], (data.terms || []).length)
             };
             
             // Validate that arrays have content